@@ -0,0 +1,66 @@
+"""Element rendering benchmark: plain render_node vs compiled templates.
+
+Run: python benchmarks/bench_elements.py [n_cards]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+
+from weblib.elements import E, Slot, compile_template
+from weblib.elements.core import render_node
+
+
+def shell(title, *content):
+    # Same structure as the navbar/sidebar shell in examples/blog_auth
+    nav = [
+        E.li(E.a(label, href=href, cls="nav-link"), cls="nav-item")
+        for label, href in [("Home", "/"), ("Posts", "/posts"), ("Register", "/register"), ("Login", "/login")]
+    ]
+    return E.div(
+        E.div(E.a("WebLib Blog", href="/", cls="navbar-brand"), cls="container-fluid").cls("navbar navbar-dark bg-dark"),
+        E.div(
+            E.div(E.ul(*nav, cls="nav flex-column nav-pills"), cls="col-3"),
+            E.div(E.h1(title, cls="mb-4"), *content, cls="col-9"),
+            cls="row mt-4",
+        ).cls("container"),
+    )
+
+
+def card(email, body, ts):
+    return E.div(
+        E.div(
+            E.h5(email, cls="card-title"),
+            E.p(body, cls="card-text"),
+            E.small(ts, cls="text-muted"),
+            cls="card-body",
+        ),
+        cls="card mb-3",
+    )
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rows = [(f"user{i}@example.com", f"Post <{i}> & more", f"2024-01-{i % 28 + 1:02d}") for i in range(n)]
+
+    shell_tpl = compile_template(shell(Slot("title"), Slot("content")))
+    card_tpl = compile_template(card(Slot("email"), Slot("body"), Slot("ts")))
+
+    def plain() -> str:
+        return render_node(shell("Posts", *[card(*r) for r in rows]))
+
+    def compiled() -> str:
+        cards = [card_tpl.bind(email=e, body=b, ts=t) for e, b, t in rows]
+        return shell_tpl.render(title="Posts", content=cards)
+
+    assert plain() == compiled()
+    number = 200
+    t_plain = timeit.timeit(plain, number=number)
+    t_comp = timeit.timeit(compiled, number=number)
+    print(f"{n} cards, {len(plain())} bytes")
+    print(f"render_node {t_plain / number * 1e3:8.3f}ms  template {t_comp / number * 1e3:8.3f}ms  x{t_plain / t_comp:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Record benchmark: slotted tuple-backed records vs the previous dataclass + dict.
+
+Rows are fetched once from an in-memory SQLite table, then wrapped by each
+implementation; the script reports build time, memory held by the records
+and attribute/to_dict access time.
+
+Run: python benchmarks/bench_records.py [n_rows]
+"""
+
+from __future__ import annotations
+
+import gc
+import sqlite3
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from weblib.orm.fields import fields
+from weblib.orm.records import record_class
+
+
+@dataclass
+class OldRecord:
+    # Reference implementation: the Record previously defined in each adapter
+    _repo: Any
+    _data: Dict[str, Any]
+
+    def __getattr__(self, item: str) -> Any:
+        if item in self._data:
+            return self._data[item]
+        raise AttributeError(item)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self._data)
+
+
+class Post:
+    id = fields.Int(pk=True)
+    title = fields.Str()
+    body = fields.Text()
+    author_id = fields.Int()
+    published = fields.Bool()
+
+
+def load_rows(n: int):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("create table post (id INTEGER PRIMARY KEY, title TEXT, body TEXT, author_id INTEGER, published INTEGER)")
+    conn.executemany(
+        "insert into post (title, body, author_id, published) values (?,?,?,?)",
+        ((f"title {i}", "lorem ipsum", i % 100, i % 2) for i in range(n)),
+    )
+    return conn.execute("select * from post").fetchall()
+
+
+def measure(label: str, build, rows) -> None:
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    recs = build(rows)
+    t_build = time.perf_counter() - t0
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    total = 0
+    for r in recs:
+        total += r.author_id
+        r.title
+    t_attr = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for r in recs:
+        r.to_dict()
+    t_dict = time.perf_counter() - t0
+    n = len(recs)
+    print(
+        f"{label:<8} build {t_build:6.2f}s  memory {mem / 2**20:7.1f} MiB ({mem / n:5.0f} B/row)  "
+        f"2 attrs {t_attr:5.2f}s  to_dict {t_dict:5.2f}s"
+    )
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = load_rows(n)
+    names = [(k, v) for k, v in Post.__dict__.items() if not k.startswith("_")]
+    PostRecord = record_class(Post, names, "id", repo=None)
+    print(f"{n} rows, 5 columns")
+    measure("old", lambda rs: [OldRecord(None, dict(r)) for r in rs], rows)
+    measure("slotted", PostRecord.from_rows, rows)
+
+
+if __name__ == "__main__":
+    main()
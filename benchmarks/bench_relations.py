@@ -0,0 +1,82 @@
+"""Relation loading benchmark: N+1 lookups vs select_related vs prefetch_related.
+
+Lists the latest posts with their authors (the blog `/posts` page) from a
+SQLite file and reports the number of queries each strategy sends and the
+time per page. Every Repository read is one `run_sync` hop, so counting
+hops counts queries.
+
+Run: python benchmarks/bench_relations.py [page_size]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from weblib.orm import Model, SQLiteORM, fields
+
+
+class Author(Model):
+    id = fields.Int(pk=True)
+    email = fields.Str(unique=True)
+
+
+class Post(Model):
+    id = fields.Int(pk=True)
+    author = fields.ForeignKey(Author, related_name="posts")
+    body = fields.Text()
+
+
+async def n_plus_one(page: int):
+    posts = await Post.query().order("id desc").limit(page).all()
+    return [(p.body, (await Author.get(id=p.author)).email) for p in posts]
+
+
+async def select_related(page: int):
+    posts = await Post.query().select_related("author").order("id desc").limit(page).all()
+    return [(p.body, p.author.email) for p in posts]
+
+
+async def prefetch_related(page: int):
+    posts = await Post.query().prefetch_related("author").order("id desc").limit(page).all()
+    return [(p.body, p.author.email) for p in posts]
+
+
+async def main() -> None:
+    page = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    orm = SQLiteORM(path)
+    await orm.bootstrap([Author, Post])
+    await orm.repo(Author).bulk_create({"email": f"user{i}@example.com"} for i in range(1000))
+    await orm.repo(Post).bulk_create({"author": i % 1000 + 1, "body": f"post {i}"} for i in range(50_000))
+
+    queries = 0
+    run_sync = orm.run_sync
+
+    async def counting(fn, readonly=False, **kw):
+        nonlocal queries
+        queries += 1
+        return await run_sync(fn, readonly, **kw)
+
+    orm.run_sync = counting  # type: ignore[method-assign]
+    rounds = 50
+    print(f"{page} posts per page, {rounds} pages")
+    expected = None
+    for label, strategy in (("N+1", n_plus_one), ("select_related", select_related), ("prefetch_related", prefetch_related)):
+        result = await strategy(page)  # warm-up (SQL cache, connections)
+        expected = expected or result
+        assert result == expected, label
+        queries = 0
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            await strategy(page)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:<17} {queries / rounds:6.0f} queries/page  {elapsed / rounds * 1e3:8.2f} ms/page")
+    await orm.drop_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
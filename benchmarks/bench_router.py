@@ -0,0 +1,74 @@
+"""Router benchmark: radix tree vs the previous linear regex scan.
+
+Run: python benchmarks/bench_router.py [n_routes]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+
+from weblib.routing.core import Router, Routes, route
+
+
+def linear_match(routes: Routes, method: str, path: str):
+    # Reference implementation: the original Router.match loop
+    for r in routes._routes:
+        if r.method != method:
+            continue
+        m = r.pattern.fullmatch(path)
+        if not m:
+            continue
+        return r.handler, {k: r.param_converters.get(k, lambda s: s)(v) for k, v in m.groupdict().items()}
+    raise LookupError("No route matched")
+
+
+def build(n: int) -> Routes:
+    routes = Routes()
+    for i in range(n // 4):
+        async def h(req, **params):
+            return None
+
+        h.__name__ = f"h{i}"
+        route.get(f"/r{i}")(h)
+        route.get(f"/r{i}/items/{{id:int}}")(h)
+        route.post(f"/r{i}/items")(h)
+        route.get(f"/r{i}/{{slug}}/detail/")(h)
+        routes.register(h)
+    return routes
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    routes = build(n)
+    router = Router(routes)
+    router.compile()
+    last = n // 4 - 1
+    cases = {
+        "first static": ("GET", "/r0"),
+        "last param": ("GET", f"/r{last}/items/42"),
+        "last slug/": ("GET", f"/r{last}/hello/detail/"),
+        "404": ("GET", "/nope/at/all"),
+    }
+    number = 20_000
+    print(f"{len(routes._routes)} routes, {number} lookups per case")
+    for label, (method, path) in cases.items():
+        def lin():
+            try:
+                linear_match(routes, method, path)
+            except LookupError:
+                pass
+
+        def tree():
+            try:
+                router.match(method, path)
+            except LookupError:
+                pass
+
+        t_lin = timeit.timeit(lin, number=number)
+        t_tree = timeit.timeit(tree, number=number)
+        print(f"{label:<14} linear {t_lin / number * 1e6:8.2f}us  radix {t_tree / number * 1e6:8.2f}us  x{t_lin / t_tree:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
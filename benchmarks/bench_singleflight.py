@@ -0,0 +1,72 @@
+"""Single-flight benchmark: a burst of identical homepage reads.
+
+Fires `burst` concurrent requests that all list the latest posts (the blog
+homepage) against a SQLite file, with and without `single_flight=True`, and
+reports the queries each burst sends and the time per burst. Every
+Repository read is one `run_sync` hop, so counting hops counts queries.
+
+Run: python benchmarks/bench_singleflight.py [burst]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from weblib.orm import Model, SQLiteORM, fields
+
+
+class Post(Model):
+    id = fields.Int(pk=True)
+    title = fields.Str()
+    body = fields.Text()
+
+
+async def homepage():
+    return await Post.query().order("id desc").limit(20).all()
+
+
+async def run(path: str, burst: int, single_flight: bool) -> None:
+    orm = SQLiteORM(path, single_flight=single_flight)
+    await orm.bootstrap([Post])
+
+    queries = 0
+    run_sync = orm.run_sync
+
+    async def counting(fn, readonly=False, **kw):
+        nonlocal queries
+        queries += 1
+        return await run_sync(fn, readonly, **kw)
+
+    orm.run_sync = counting  # type: ignore[method-assign]
+    await asyncio.gather(*(homepage() for _ in range(burst)))  # warm-up (SQL cache, connections)
+    rounds = 20
+    queries = 0
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        pages = await asyncio.gather(*(homepage() for _ in range(burst)))
+    elapsed = time.perf_counter() - t0
+    assert all(page == pages[0] for page in pages)
+    label = "single_flight" if single_flight else "plain"
+    print(f"{label:<14} {queries / rounds:6.0f} queries/burst  {elapsed / rounds * 1e3:8.2f} ms/burst")
+    await orm.close()
+
+
+async def main() -> None:
+    burst = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    orm = SQLiteORM(path)
+    await orm.bootstrap([Post])
+    await orm.repo(Post).bulk_create({"title": f"post {i}", "body": "lorem ipsum " * 20} for i in range(10_000))
+    await orm.close()
+    print(f"{burst} concurrent homepage requests, 20 bursts")
+    for single_flight in (False, True):
+        await run(path, burst, single_flight)
+    await SQLiteORM(path).drop_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -7,7 +7,9 @@ from .routing.core import Router, Routes
 from .assets.static import Static
 from .runtime.asgi import ASGIApp, Request, Response
 from .runtime.adapters import adapt_result
-from .runtime.middleware import Middleware, apply_middlewares
+from .runtime.compression import Compressor
+from .runtime.conditional import apply_etag
+from .runtime.middleware import Middleware, MiddlewareStack, apply_middlewares
 
 
 @dataclass
@@ -19,9 +21,17 @@ class WebAppConfig:
     security_headers: bool = True
     gzip: bool = False
     brotli: bool = False
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    compress_min_size: int = 500
     etags: bool = True
     max_body_size: int | None = 2 * 1024 * 1024
     logging: bool = True
+    # Database pool, applied via orm.configure(); None keeps the ORM's own setting
+    db_pool_size: int | None = None
+    db_acquire_timeout: float | None = None
+    db_max_lifetime: float | None = None
+    db_slow_query_ms: float | None = None
 
 
 class WebApp:
@@ -38,11 +48,35 @@ class WebApp:
         self.routes = routes or Routes()
         self.router = Router(self.routes)
         self.orm = orm
+        configure = getattr(orm, "configure", None)
+        if callable(configure):
+            configure(
+                pool_size=self.config.db_pool_size,
+                acquire_timeout=self.config.db_acquire_timeout,
+                max_lifetime=self.config.db_max_lifetime,
+                slow_query_ms=self.config.db_slow_query_ms,
+            )
         self.static = static
-        self.middlewares: list[Middleware] = []
+        self._middlewares = MiddlewareStack()
+        # Precompiled handler chains, one per Route (keyed by id); rebuilt by
+        # freeze() whenever the global stack, Routes.use or register change.
+        self._chains: Dict[int, Any] = {}
+        self._chains_stamp: tuple[int, int] | None = None
+        self._compressor: Compressor | None = None
+        if self.config.gzip or self.config.brotli:
+            self._compressor = Compressor(
+                gzip=self.config.gzip,
+                brotli=self.config.brotli,
+                gzip_level=self.config.gzip_level,
+                brotli_quality=self.config.brotli_quality,
+                min_size=self.config.compress_min_size,
+            )
 
         # Compose ASGI app
         async def app(scope, receive, send):
+            if scope["type"] == "lifespan":
+                await self._lifespan(receive, send)
+                return
             if scope["type"] != "http":
                 # Only basic HTTP supported in MVP
                 await Response.text("Not Implemented", status=501)(scope, receive, send)
@@ -56,7 +90,7 @@ class WebApp:
 
             req = Request(scope, receive)
             try:
-                handler, params, route_mw = self.router.match(req.method, path)
+                r, params = self.router.lookup(req.method, path)
             except LookupError:
                 await Response.text("Not Found", status=404)(scope, receive, send)
                 return
@@ -65,13 +99,20 @@ class WebApp:
             req.state["app"] = self
             req.state["di"] = self._container
 
-            # Compose middlewares (global + route-level)
-            wrapped = apply_middlewares(handler, [*self.middlewares, *route_mw])
-            result = await wrapped(req, **params)
+            # Middlewares (global + route-level) are composed once, not per request
+            chain = self._chains.get(id(r)) if self._chains_stamp == (self._middlewares.version, self.routes._version) else None
+            if chain is None:
+                self.freeze()
+                chain = self._chains[id(r)]
+            result = await chain(req, **params)
 
             # Normalize result to ASGI response
             resp = adapt_result(result)
 
+            # ETag on buffered GET responses; matching If-None-Match -> empty 304
+            if self.config.etags:
+                resp = apply_etag(resp, req.method, req.headers.get("if-none-match"))
+
             # Security headers baseline
             if self.config.security_headers:
                 resp.headers.setdefault("X-Content-Type-Options", "nosniff")
@@ -79,15 +120,58 @@ class WebApp:
                 resp.headers.setdefault("X-Frame-Options", "DENY")
                 resp.headers.setdefault("Strict-Transport-Security", "max-age=31536000; includeSubDomains")
 
+            # Compression negotiated from Accept-Encoding (config.gzip/brotli)
+            if self._compressor is not None:
+                resp = self._compressor.apply(resp, req.headers.get("accept-encoding", ""))
+
             await resp(scope, receive, send)
 
         self._asgi = app
 
-    async def on_startup(self) -> None:  # hooks for future use
-        pass
+    def freeze(self) -> None:
+        """Compose the middleware chain of every route once.
+
+        Called lazily on the first request and again after any change to the
+        global or route-level middleware stacks.
+        """
+        stack = list(self.middlewares)
+        self._chains = {id(r): apply_middlewares(r.handler, [*stack, *(r.middlewares or [])]) for r in self.routes._routes}
+        self._chains_stamp = (self._middlewares.version, self.routes._version)
+
+    async def on_startup(self) -> None:
+        """Run once before serving (ASGI lifespan startup).
+
+        Bootstraps the ORM schema: every model registered via `orm.repo()`
+        gets its table created/verified once, so adapters built with
+        `auto_create=False` skip the per-call check.
+        """
+        bootstrap = getattr(self.orm, "bootstrap", None)
+        if callable(bootstrap):
+            await bootstrap()
 
     async def on_shutdown(self) -> None:
-        pass
+        close = getattr(self.orm, "close", None)
+        if callable(close):
+            await close()
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.on_startup()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    await self.on_shutdown()
+                except Exception as e:
+                    await send({"type": "lifespan.shutdown.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.shutdown.complete"})
+                return
 
     # DI minimal
     def provide(self, key: str, value: object) -> None:
@@ -104,6 +188,17 @@ class WebApp:
             setup(self)
 
     # Middleware registration
+    @property
+    def middlewares(self) -> MiddlewareStack:
+        return self._middlewares
+
+    @middlewares.setter
+    def middlewares(self, stack: list[Middleware]) -> None:
+        # a new list still invalidates the compiled chains
+        version = self._middlewares.version + 1
+        self._middlewares = MiddlewareStack(stack)
+        self._middlewares.version = version
+
     def use(self, middleware: Middleware) -> None:
         self.middlewares.append(middleware)
 
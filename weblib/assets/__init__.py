@@ -1,4 +1,5 @@
 from .static import Static
+from .precompress import precompress
 
-__all__ = ["Static"]
+__all__ = ["Static", "precompress"]
 
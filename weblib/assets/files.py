@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+import os
+import stat
+import time
+import uuid
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import AsyncIterator, Dict, List, Mapping, MutableMapping, Optional, Tuple
+
+from ..runtime.asgi import Receive, Response, Scope, Send
+from ..utils import etag_matches
+
+# Size of each read when a file is streamed without a zero-copy extension
+READ_CHUNK = 64 * 1024
+MAX_RANGES = 16  # distinct ranges served as multipart; more gets the full file
+
+
+@dataclass(frozen=True)
+class FileInfo:
+    path: str
+    size: int
+    mtime: float
+    etag: str
+    last_modified: str
+    content_type: str
+
+
+def _stat(path: str) -> Optional[FileInfo]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    mime, _ = mimetypes.guess_type(path)
+    return FileInfo(
+        path=path,
+        size=st.st_size,
+        mtime=st.st_mtime,
+        etag=f"\"{st.st_size:x}-{st.st_mtime_ns:x}\"",
+        last_modified=formatdate(st.st_mtime, usegmt=True),
+        content_type=mime or "application/octet-stream",
+    )
+
+
+class StatCache:
+    """Caches os.stat results for `ttl` seconds.
+
+    Lookups that miss the cache stat the file in a worker thread. A missing
+    file is only remembered with `cache_miss=True`, so a file created right
+    after a 404 is served on the next request.
+    """
+
+    def __init__(self, ttl: float = 2.0, maxsize: int = 4096) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: Dict[str, Tuple[float, Optional[FileInfo]]] = {}
+
+    async def get(self, path: str, cache_miss: bool = False) -> Optional[FileInfo]:
+        entry = self._entries.get(path)
+        now = time.monotonic()
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        info = await asyncio.to_thread(_stat, path)
+        if info is None and not cache_miss:
+            self._entries.pop(path, None)
+            return None
+        if len(self._entries) >= self.maxsize:
+            # drop the oldest half; dicts keep insertion order
+            for key in list(self._entries)[: self.maxsize // 2]:
+                del self._entries[key]
+        self._entries[path] = (now + self.ttl, info)
+        return info
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _request_headers(scope: Scope) -> Dict[str, str]:
+    wanted = {b"if-none-match", b"if-modified-since", b"range", b"if-range", b"accept-encoding"}
+    return {k.decode().lower(): v.decode() for k, v in scope.get("headers", []) if k.lower() in wanted}
+
+
+def _not_modified(h: Mapping[str, str], info: FileInfo) -> bool:
+    inm = h.get("if-none-match")
+    if inm is not None:
+        return etag_matches(inm, info.etag)
+    ims = h.get("if-modified-since")
+    if ims:
+        try:
+            return int(info.mtime) <= parsedate_to_datetime(ims).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def parse_ranges(header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Parse a `Range: bytes=...` header into inclusive (start, end) pairs.
+
+    Overlapping and adjacent ranges are merged, so repeating a range can't
+    multiply the response. Returns None when the header is malformed or
+    asks for more than `MAX_RANGES` ranges (serve the full file) and an
+    empty list when no range is satisfiable (416).
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+    ranges: List[Tuple[int, int]] = []
+    for part in spec.split(","):
+        start_s, dash, end_s = part.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if start_s == "":
+                n = int(end_s)
+                if n <= 0:
+                    continue
+                start, end = max(size - n, 0), size - 1
+            else:
+                start = int(start_s)
+                end = int(end_s) if end_s else start
+                if start > end:
+                    return None
+                if start >= size:
+                    continue
+                end = min(end, size - 1) if end_s else size - 1
+        except ValueError:
+            return None
+        if start < size:
+            ranges.append((start, end))
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    if len(merged) > MAX_RANGES:
+        return None
+    return merged
+
+
+async def _read_file(path: str, spans: List[Tuple[int, int]], parts: List[bytes] | None = None, tail: bytes = b"") -> AsyncIterator[bytes]:
+    f = await asyncio.to_thread(open, path, "rb")
+    try:
+        for i, (start, end) in enumerate(spans):
+            if parts is not None:
+                yield parts[i]
+            await asyncio.to_thread(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = await asyncio.to_thread(f.read, min(READ_CHUNK, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        if tail:
+            yield tail
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+class FileResponse(Response):
+    """Serve a file from disk with validators, conditional GET and ranges.
+
+    Sends `ETag`/`Last-Modified`, answers `If-None-Match`/`If-Modified-Since`
+    with 304, supports single and multipart byte ranges (`If-Range` aware),
+    and uses the ASGI `http.response.pathsend` or `http.response.zerocopy`
+    extensions when the server advertises them; otherwise the file is read
+    in chunks off the event loop.
+    """
+
+    # static assets rely on precompressed siblings instead
+    compressible = False
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        status: int = 200,
+        content_type: str | None = None,
+        headers: Optional[MutableMapping[str, str]] = None,
+        stat_cache: StatCache | None = None,
+    ) -> None:
+        super().__init__(b"", status=status, content_type=content_type, headers=headers)
+        self.path = path
+        # without a cache (HTTP.file) every send stats the file: handlers may have just written it
+        self.stat_cache = stat_cache
+
+    async def _send(self, scope: Scope, receive: Receive, send: Send):
+        if self.stat_cache is not None:
+            info = await self.stat_cache.get(self.path)
+        else:
+            info = await asyncio.to_thread(_stat, self.path)
+        if info is None:
+            await Response.text("Not Found", status=404)(scope, receive, send)
+            return
+        await self._send_file(info, info.path, scope, receive, send)
+
+    async def _send_file(self, info: FileInfo, path: str, scope: Scope, receive: Receive, send: Send):
+        h = _request_headers(scope)
+        method = scope.get("method", "GET").upper()
+        headers = self.headers
+        headers.setdefault("content-type", info.content_type)
+        headers["etag"] = info.etag
+        headers["last-modified"] = info.last_modified
+        headers["accept-ranges"] = "bytes"
+
+        if self.status == 200 and method in ("GET", "HEAD") and _not_modified(h, info):
+            for k in ("content-type", "content-length", "content-disposition", "accept-ranges"):
+                headers.pop(k, None)
+            self.status = 304
+            await self._send_start(send)
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        size = info.size
+        ranges: Optional[List[Tuple[int, int]]] = None
+        if self.status == 200 and method == "GET" and "range" in h:
+            if_range = h.get("if-range")
+            if not if_range or if_range in (info.etag, info.last_modified):
+                ranges = parse_ranges(h["range"], size)
+                if ranges == []:
+                    headers.pop("content-type", None)
+                    headers["content-range"] = f"bytes */{size}"
+                    headers["content-length"] = "0"
+                    self.status = 416
+                    await self._send_start(send)
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    return
+
+        extensions = scope.get("extensions") or {}
+        if not ranges:
+            headers["content-length"] = str(size)
+            await self._send_start(send)
+            if method == "HEAD" or size == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.pathsend" in extensions:
+                await send({"type": "http.response.pathsend", "path": path})
+            elif "http.response.zerocopy" in extensions:
+                await self._zerocopy(send, path, [(0, size - 1)])
+            else:
+                self.body = _read_file(path, [(0, size - 1)])
+                await self._send_body(receive, send)
+            return
+
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+            self.status = 206
+            await self._send_start(send)
+            if "http.response.zerocopy" in extensions:
+                await self._zerocopy(send, path, ranges)
+            else:
+                self.body = _read_file(path, ranges)
+                await self._send_body(receive, send)
+            return
+
+        boundary = uuid.uuid4().hex
+        ctype = headers.pop("content-type")
+        parts = [
+            f"--{boundary}\r\nContent-Type: {ctype}\r\nContent-Range: bytes {s}-{e}/{size}\r\n\r\n".encode()
+            for s, e in ranges
+        ]
+        # every part after the first starts on a new line
+        parts = [parts[0]] + [b"\r\n" + p for p in parts[1:]]
+        tail = f"\r\n--{boundary}--\r\n".encode()
+        length = sum(len(p) for p in parts) + sum(e - s + 1 for s, e in ranges) + len(tail)
+        headers["content-type"] = f"multipart/byteranges; boundary={boundary}"
+        headers["content-length"] = str(length)
+        self.status = 206
+        await self._send_start(send)
+        self.body = _read_file(path, ranges, parts, tail)
+        await self._send_body(receive, send)
+
+    @staticmethod
+    async def _zerocopy(send: Send, path: str, spans: List[Tuple[int, int]]) -> None:
+        f = await asyncio.to_thread(open, path, "rb")
+        try:
+            for i, (start, end) in enumerate(spans):
+                await send(
+                    {
+                        "type": "http.response.zerocopy",
+                        "file": f,
+                        "offset": start,
+                        "count": end - start + 1,
+                        "more_body": i < len(spans) - 1,
+                    }
+                )
+        finally:
+            await asyncio.to_thread(f.close)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import gzip
+import mimetypes
+import os
+from typing import Iterable, List
+
+# Supported formats and the sibling extension each one writes
+EXTENSIONS = {"gzip": ".gz", "br": ".br"}
+
+# Extensions worth compressing besides text/* types
+_COMPRESSIBLE_EXT = {".js", ".mjs", ".css", ".html", ".htm", ".json", ".map", ".svg", ".xml", ".txt", ".wasm", ".ico", ".webmanifest"}
+
+
+def _compressible(path: str) -> bool:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in _COMPRESSIBLE_EXT:
+        return True
+    mime, _ = mimetypes.guess_type(path)
+    return bool(mime) and mime.startswith("text/")
+
+
+def _compress(data: bytes, fmt: str) -> bytes:
+    if fmt == "gzip":
+        # mtime=0 keeps the output byte-identical across builds
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    import brotli  # type: ignore
+
+    return brotli.compress(data, quality=11)
+
+
+def precompress(directory: str, formats: Iterable[str] = ("gzip", "br"), min_size: int = 256) -> List[str]:
+    """Write `.gz`/`.br` siblings for compressible files under `directory`.
+
+    Files smaller than `min_size`, or that don't shrink, are skipped;
+    siblings newer than their source are left untouched. Returns the paths
+    written. Brotli requires the optional `brotli` package.
+    """
+    formats = list(formats)
+    unknown = [fmt for fmt in formats if fmt not in EXTENSIONS]
+    if unknown:
+        raise ValueError(f"Unknown compression format(s) {', '.join(map(repr, unknown))}; choose from: {', '.join(EXTENSIONS)}")
+    if "br" in formats:
+        try:
+            import brotli  # type: ignore  # noqa: F401
+        except Exception as e:
+            raise RuntimeError("brotli non installato. Esegui: pip install brotli (oppure usa --formats gzip)") from e
+    written: List[str] = []
+    for root, _dirs, files in os.walk(directory):
+        for name in files:
+            src = os.path.join(root, name)
+            if name.endswith((".gz", ".br")) or not _compressible(src):
+                continue
+            st = os.stat(src)
+            if st.st_size < min_size:
+                continue
+            data = None
+            for fmt in formats:
+                dst = src + EXTENSIONS[fmt]
+                if os.path.exists(dst) and os.stat(dst).st_mtime >= st.st_mtime:
+                    continue
+                if data is None:
+                    with open(src, "rb") as f:
+                        data = f.read()
+                out = _compress(data, fmt)
+                if len(out) >= len(data):
+                    if os.path.exists(dst):
+                        os.remove(dst)
+                    continue
+                with open(dst, "wb") as f:
+                    f.write(out)
+                written.append(dst)
+    return written
@@ -1,29 +1,72 @@
 from __future__ import annotations
 
-import mimetypes
 import os
-from typing import Any, Dict
+from dataclasses import replace
+from typing import Dict
 
 from ..runtime.asgi import Response
+from ..utils import negotiate_encoding
+from .files import FileResponse, StatCache
+
+# Sibling files produced by `weblib compress`, in server preference order
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
 
 
 class Static:
-    def __init__(self, directory: str, mount: str = "/static", versioned: bool = True) -> None:
+    def __init__(
+        self,
+        directory: str,
+        mount: str = "/static",
+        versioned: bool = True,
+        stat_ttl: float = 2.0,
+        precompressed: bool = True,
+    ) -> None:
         self.directory = os.path.abspath(directory)
         self.mount = mount.rstrip("/") or "/static"
         self.versioned = versioned
+        self.precompressed = precompressed
+        self.stat_cache = StatCache(ttl=stat_ttl)
+        self._resolved: Dict[str, str | None] = {}
 
-    async def asgi(self, scope, receive, send):
-        path = scope.get("path", "")
+    def resolve(self, path: str) -> str | None:
+        """Map a request path under the mount to a file path (None if outside)."""
+        full = self._resolved.get(path)
+        if full is not None or path in self._resolved:
+            return full
         rel = path[len(self.mount) :].lstrip("/")
         # prevent path traversal
         full = os.path.abspath(os.path.join(self.directory, rel))
-        if not full.startswith(self.directory) or not os.path.isfile(full):
+        if full != self.directory and not full.startswith(self.directory + os.sep):
+            full = None
+        if len(self._resolved) >= self.stat_cache.maxsize:
+            self._resolved.clear()
+        self._resolved[path] = full
+        return full
+
+    async def asgi(self, scope, receive, send):
+        full = self.resolve(scope.get("path", ""))
+        if full is None:
+            await Response.text("Not Found", status=404)(scope, receive, send)
+            return
+        info = await self.stat_cache.get(full)
+        if info is None:
             await Response.text("Not Found", status=404)(scope, receive, send)
             return
-        mime, _ = mimetypes.guess_type(full)
-        with open(full, "rb") as f:
-            data = f.read()
         headers = {"cache-control": "public, max-age=3600"}
-        await Response(data, status=200, content_type=mime or "application/octet-stream", headers=headers)(scope, receive, send)
-
+        if self.precompressed:
+            # Serve a sibling .br/.gz when the client accepts it; missing siblings are cached
+            variants = {}
+            for encoding, ext in PRECOMPRESSED:
+                sibling = await self.stat_cache.get(full + ext, cache_miss=True)
+                # older than the source (edited after `weblib compress`): serve the original
+                if sibling is not None and sibling.mtime >= info.mtime:
+                    variants[encoding] = sibling
+            if variants:
+                headers["vary"] = "Accept-Encoding"
+                accept = next((v.decode() for k, v in scope.get("headers", []) if k.lower() == b"accept-encoding"), "")
+                encoding = negotiate_encoding(accept, list(variants))
+                if encoding is not None:
+                    headers["content-encoding"] = encoding
+                    info = replace(variants[encoding], content_type=info.content_type)
+        resp = FileResponse(full, headers=headers, stat_cache=self.stat_cache)
+        await resp._send_file(info, info.path, scope, receive, send)
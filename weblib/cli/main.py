@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
+import importlib
 import os
 import sys
 
@@ -56,6 +58,89 @@ def cmd_dev(args: argparse.Namespace) -> int:
     return 0
 
 
+def _formats(value: str) -> list[str]:
+    from ..assets.precompress import EXTENSIONS
+
+    formats = [f.strip() for f in value.split(",") if f.strip()]
+    for fmt in formats:
+        if fmt not in EXTENSIONS:
+            raise argparse.ArgumentTypeError(f"invalid choice: {fmt!r} (choose from {', '.join(EXTENSIONS)})")
+    return formats
+
+
+def cmd_compress(args: argparse.Namespace) -> int:
+    from ..assets.precompress import precompress
+
+    if not os.path.isdir(args.directory):
+        print(f"Directory not found: {args.directory}")
+        return 1
+    if args.formats:
+        formats = args.formats
+    else:
+        formats = ["gzip"]
+        try:
+            import brotli  # type: ignore  # noqa: F401
+
+            formats.append("br")
+        except Exception:
+            print("brotli not installed: writing .gz only (pip install brotli for .br)")
+    try:
+        written = precompress(args.directory, formats=formats, min_size=args.min_size)
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+    for path in written:
+        print(f"  {path}")
+    print(f"{len(written)} compressed files written")
+    return 0
+
+
+def _load_orm(spec: str):
+    # "package.module:attr" (attr defaults to "orm"), imported from the current directory
+    module_name, _, attr = spec.partition(":")
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+    return getattr(importlib.import_module(module_name), attr or "orm")
+
+
+def cmd_migrate(args: argparse.Namespace) -> int:
+    from ..orm import migrations
+
+    try:
+        orm = _load_orm(args.orm)
+    except (ImportError, AttributeError) as e:
+        print(f"Cannot load ORM {args.orm!r}: {e}")
+        return 1
+
+    async def run() -> int:
+        try:
+            if args.action == "make":
+                path = await migrations.make_migration(orm, args.dir, args.name)
+                print(f"Created {path}" if path else "No changes: schema matches the models")
+            elif args.action == "apply":
+                done = await migrations.apply_migrations(orm, args.dir)
+                for version in done:
+                    print(f"  applied {version}")
+                print(f"{len(done)} migrations applied")
+            else:
+                status = await migrations.migration_status(orm, args.dir)
+                for version, applied in status:
+                    print(f"  [{'x' if applied else ' '}] {version}")
+                if not status:
+                    print(f"No migrations in {args.dir}")
+        finally:
+            close = getattr(orm, "close", None)
+            if callable(close):
+                await close()
+        return 0
+
+    try:
+        return asyncio.run(run())
+    except RuntimeError as e:
+        print(str(e))
+        return 1
+
+
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser("weblib")
     sub = p.add_subparsers(dest="cmd")
@@ -70,6 +155,19 @@ def build_parser() -> argparse.ArgumentParser:
     p_routes = sub.add_parser("routes", help="Show routes (placeholder)")
     p_routes.set_defaults(func=cmd_routes)
 
+    p_compress = sub.add_parser("compress", help="Precompress static assets (.gz/.br)")
+    p_compress.add_argument("directory")
+    p_compress.add_argument("--formats", type=_formats, default=None, help="comma separated: gzip,br (default: both if brotli is installed)")
+    p_compress.add_argument("--min-size", type=int, default=256, help="skip files smaller than this (bytes)")
+    p_compress.set_defaults(func=cmd_compress)
+
+    p_migrate = sub.add_parser("migrate", help="Generate/apply schema migrations")
+    p_migrate.add_argument("action", choices=["make", "apply", "status"])
+    p_migrate.add_argument("--orm", default="app:orm", help="module:attribute of the ORM instance (models registered on import)")
+    p_migrate.add_argument("--dir", default="migrations", help="directory of the NNNN_name.sql files")
+    p_migrate.add_argument("--name", default="auto", help="name of the new migration (make)")
+    p_migrate.set_defaults(func=cmd_migrate)
+
     return p
 
 
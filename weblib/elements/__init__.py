@@ -1,4 +1,5 @@
 from .core import Element, E, Component, Var
+from .template import Slot, Template, compile_template
 
-__all__ = ["Element", "E", "Component", "Var"]
+__all__ = ["Element", "E", "Component", "Var", "Slot", "Template", "compile_template"]
 
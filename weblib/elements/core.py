@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, replace
-from typing import Any, Generic, Iterable, Tuple, TypeVar
+from typing import Any, Generic, Iterable, Iterator, Tuple, TypeVar
 
 from ..utils import escape_html
 
@@ -39,19 +39,42 @@ def render_attr(k: str, v: Any) -> str:
     return f"{k}=\"{escape_html(str(v))}\""
 
 
+def _opening_tag(n: Element) -> str:
+    attrs = " ".join(filter(None, (render_attr(k, v) for k, v in n.attrs.items())))
+    return f"<{n.tag}{(' ' + attrs) if attrs else ''}>"
+
+
 def render_node(n: Node) -> str:
     if n is None:
         return ""
     if isinstance(n, Element):
-        attrs = " ".join(filter(None, (render_attr(k, v) for k, v in n.attrs.items())))
-        opening = f"<{n.tag}{(' ' + attrs) if attrs else ''}>"
         children = "".join(render_node(c) for c in n.children)
-        return f"{opening}{children}</{n.tag}>"
+        return f"{_opening_tag(n)}{children}</{n.tag}>"
     if isinstance(n, Component):
         return render_node(n.render())
+    if hasattr(n, "__html__"):
+        # pre-rendered markup (e.g. a bound Template)
+        return n.__html__()
     return escape_html(str(n))
 
 
+def render_node_iter(n: Node) -> Iterator[str]:
+    """Like render_node, but yields the markup piece by piece.
+
+    Elements whose children are all leaves are rendered in one go, so the
+    number of yielded pieces stays proportional to the structure of the page.
+    """
+    if isinstance(n, Component):
+        n = n.render()
+    if not isinstance(n, Element) or all(not isinstance(c, (Element, Component)) for c in n.children):
+        yield render_node(n)
+        return
+    yield _opening_tag(n)
+    for c in n.children:
+        yield from render_node_iter(c)
+    yield f"</{n.tag}>"
+
+
 class _EFactory:
     def __getattr__(self, tag: str):
         def factory(*children: Node, **attrs):
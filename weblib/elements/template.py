@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Tuple
+
+from .core import Component, Element, Node, render_attr, render_node
+
+
+class Slot:
+    """Placeholder for a value supplied at render time.
+
+    Use it as a child (`E.h1(Slot("title"))`) or as an attribute value
+    (`E.a("Edit", href=Slot("url"))`). Child values are rendered like any
+    node (str is escaped, Element/Component rendered, lists concatenated).
+    """
+
+    __slots__ = ("name", "default")
+
+    _MISSING = object()
+
+    def __init__(self, name: str, default: Any = _MISSING) -> None:
+        self.name = name
+        self.default = default
+
+    def __repr__(self) -> str:
+        return f"Slot({self.name!r})"
+
+
+def _render_value(v: Any) -> str:
+    if isinstance(v, (list, tuple)):
+        return "".join(render_node(x) for x in v)
+    return render_node(v)
+
+
+def _has_slot(n: Node) -> bool:
+    if isinstance(n, Slot):
+        return True
+    if isinstance(n, Component):
+        return _has_slot(n.render())
+    if isinstance(n, Element):
+        return any(isinstance(v, Slot) for v in n.attrs.values()) or any(_has_slot(c) for c in n.children)
+    return False
+
+
+class Template:
+    """An Element/Component tree compiled once into static fragments and holes.
+
+    Subtrees without any `Slot` are rendered (and escaped) at compile time;
+    `render(**values)` only fills the holes and joins the parts.
+    """
+
+    def __init__(self, parts: List[str], holes: List[Tuple[int, Slot, str | None]]) -> None:
+        self._parts = parts
+        self._holes = holes  # (index in parts, slot, attribute name or None)
+
+    @property
+    def slots(self) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(s.name for _, s, _ in self._holes))
+
+    def render(self, **values: Any) -> str:
+        out = list(self._parts)
+        for i, slot, attr in self._holes:
+            v = values.get(slot.name, slot.default)
+            if v is Slot._MISSING:
+                raise KeyError(f"Missing value for slot {slot.name!r}")
+            if attr is None:
+                out[i] = _render_value(v)
+            else:
+                a = render_attr(attr, v)
+                out[i] = " " + a if a else ""
+        return "".join(out)
+
+    def bind(self, **values: Any) -> "BoundTemplate":
+        return BoundTemplate(self, values)
+
+
+class BoundTemplate:
+    """A Template with its values; usable as a node in Page/Element trees."""
+
+    __slots__ = ("template", "values")
+
+    def __init__(self, template: Template, values: Dict[str, Any]) -> None:
+        self.template = template
+        self.values = values
+
+    def __html__(self) -> str:
+        return self.template.render(**self.values)
+
+
+class _Builder:
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.holes: List[Tuple[int, Slot, str | None]] = []
+
+    def text(self, s: str) -> None:
+        if not s:
+            return
+        if self.parts and not self._is_hole(len(self.parts) - 1):
+            self.parts[-1] += s
+        else:
+            self.parts.append(s)
+
+    def hole(self, slot: Slot, attr: str | None = None) -> None:
+        self.holes.append((len(self.parts), slot, attr))
+        self.parts.append("")
+
+    def _is_hole(self, i: int) -> bool:
+        return bool(self.holes) and self.holes[-1][0] == i
+
+    def node(self, n: Node) -> None:
+        if isinstance(n, Component):
+            n = n.render()
+        if isinstance(n, Slot):
+            self.hole(n)
+            return
+        if not isinstance(n, Element) or not _has_slot(n):
+            self.text(render_node(n))
+            return
+        self.text(f"<{n.tag}")
+        for k, v in n.attrs.items():
+            if isinstance(v, Slot):
+                self.hole(v, k)
+            else:
+                a = render_attr(k, v)
+                if a:
+                    self.text(" " + a)
+        self.text(">")
+        for c in n.children:
+            self.node(c)
+        self.text(f"</{n.tag}>")
+
+
+def compile_template(node: Node) -> Template:
+    """Compile an Element/Component tree containing `Slot`s into a Template.
+
+    Components are rendered once at compile time, so their output must not
+    depend on per-request state other than the slots they contain.
+    """
+    b = _Builder()
+    b.node(node)
+    return Template(b.parts, b.holes)
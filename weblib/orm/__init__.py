@@ -1,7 +1,8 @@
 from .protocol import ORM, Model  # Protocols / typing
-from .fields import fields  # Concrete field factory
+from .fields import Index, fields  # Concrete field factory / index declarations
 from .sqlite_impl import SQLiteORM  # Concrete adapter (SQLite)
 from .postgres_impl import PostgresORM  # Concrete adapter (PostgreSQL via asyncpg)
 from .mysql_impl import MySQLORM  # Concrete adapter (MySQL via asyncmy/aiomysql)
+from .resultcache import CacheBackend, MemoryCache, ResultCache  # Opt-in cache of get/find results
 
-__all__ = ["ORM", "Model", "fields", "SQLiteORM", "PostgresORM", "MySQLORM"]
+__all__ = ["ORM", "Model", "fields", "Index", "SQLiteORM", "PostgresORM", "MySQLORM", "ResultCache", "MemoryCache", "CacheBackend"]
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Rows = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+
+# righe inviate per statement / COPY, se non indicato
+BATCH_SIZE = 1000
+
+
+async def batches(rows: Rows, size: int = BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Raggruppa un flusso (sync o async) di dict in liste da `size` righe."""
+    size = max(1, int(size))
+    batch: List[Dict[str, Any]] = []
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:  # type: ignore[union-attr]
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for row in rows:  # type: ignore[union-attr]
+            batch.append(row)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def columns(mi: Any, row: Dict[str, Any]) -> List[str]:
+    """Colonne del modello presenti nella prima riga del flusso, nell'ordine dichiarato.
+
+    Tutte le righe devono avere le stesse colonne del modello (lo verifica `values`).
+    """
+    cols = [name for name, _ in mi.fields if name in row]
+    if not cols:
+        raise ValueError(f"Nessuna colonna del modello {mi.table!r} nei dati da inserire")
+    return cols
+
+
+def values(mi: Any, batch: List[Dict[str, Any]], cols: Sequence[str]) -> List[Tuple[Any, ...]]:
+    out: List[Tuple[Any, ...]] = []
+    for row in batch:
+        try:
+            out.append(tuple([row[c] for c in cols]))
+        except KeyError:
+            raise ValueError(_mismatch(mi, row, cols)) from None
+        if len(row) > len(cols) and any(name in row and name not in cols for name, _ in mi.fields):
+            raise ValueError(_mismatch(mi, row, cols))
+    return out
+
+
+def _mismatch(mi: Any, row: Dict[str, Any], cols: Sequence[str]) -> str:
+    # niente NULL impliciti né colonne scartate: meglio un errore che dati diversi da quelli passati
+    keys = [name for name, _ in mi.fields if name in row]
+    return (
+        f"Le righe per {mi.table!r} devono avere tutte le stesse colonne: la prima ha {', '.join(cols)}, "
+        f"questa {', '.join(keys) or '(nessuna)'}; dividi le righe in chiamate separate"
+    )
+
+
+def auto_pk(mi: Any, cols: Sequence[str]) -> bool:
+    """True se la primary key di queste righe la genera il database."""
+    return bool(mi.pk) and mi.pk not in cols and any(n == mi.pk and f.kind == "int" for n, f in mi.fields)
+
+
+def upsert_columns(
+    mi: Any, cols: Sequence[str], conflict: Optional[Sequence[str]], update: Optional[Sequence[str]]
+) -> Tuple[List[str], List[str]]:
+    """Colonne del conflitto (default: pk) e colonne da sovrascrivere."""
+    target = list(conflict or ([mi.pk] if mi.pk else []))
+    if not target:
+        raise ValueError("bulk_upsert richiede `conflict=` per modelli senza primary key")
+    missing = [c for c in target if c not in cols]
+    if missing:
+        raise ValueError(f"Le righe devono contenere le colonne di conflitto: {', '.join(missing)}")
+    changed = [c for c in (update or cols) if c not in target]
+    return target, changed
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Optional, Type
+from typing import Any, Optional, Tuple, Type
 
 
 @dataclass
@@ -11,33 +11,58 @@ class Field:
     default: Any | None = None
     max_length: int | None = None
     unique: bool = False
-    to: Optional[Type] = None  # for ForeignKey
+    to: Optional[Type] = None  # for ForeignKey (classe o nome del modello)
+    index: bool = False
+    related_name: Optional[str] = None  # relazione inversa per prefetch_related (es. "posts")
+
+
+class Index:
+    """Indice dichiarato in `Meta.indexes` (composito e/o parziale).
+
+    `Index("author_id", "created")`, `Index("email", unique=True)`,
+    `Index("created", where="published = 1")`. Il nome di default è
+    `ix_<tabella>_<colonne>` (`ux_` se univoco). MySQL non ha indici
+    parziali: lì `where` dà ValueError.
+    """
+
+    __slots__ = ("columns", "name", "unique", "where")
+
+    def __init__(self, *columns: str, name: str | None = None, unique: bool = False, where: str | None = None) -> None:
+        if not columns:
+            raise ValueError("Index richiede almeno una colonna")
+        self.columns: Tuple[str, ...] = columns
+        self.name = name
+        self.unique = unique
+        self.where = where
+
+    def __repr__(self) -> str:
+        return f"Index({', '.join(map(repr, self.columns))}, name={self.name!r}, unique={self.unique}, where={self.where!r})"
 
 
 class fields:
     @staticmethod
-    def Int(pk: bool = False, default: int | None = None) -> Field:
-        return Field(kind="int", pk=pk, default=default)
+    def Int(pk: bool = False, default: int | None = None, index: bool = False) -> Field:
+        return Field(kind="int", pk=pk, default=default, index=index)
 
     @staticmethod
-    def Str(max_length: int | None = None, unique: bool = False) -> Field:
-        return Field(kind="str", max_length=max_length, unique=unique)
+    def Str(max_length: int | None = None, unique: bool = False, index: bool = False) -> Field:
+        return Field(kind="str", max_length=max_length, unique=unique, index=index)
 
     @staticmethod
     def Text() -> Field:
         return Field(kind="text")
 
     @staticmethod
-    def Bool(default: bool = False) -> Field:
-        return Field(kind="bool", default=default)
+    def Bool(default: bool = False, index: bool = False) -> Field:
+        return Field(kind="bool", default=default, index=index)
 
     @staticmethod
-    def Datetime(auto_now: bool = False, auto_now_add: bool = False) -> Field:
+    def Datetime(auto_now: bool = False, auto_now_add: bool = False, index: bool = False) -> Field:
         # auto_now* non implementati nell'MVP; lasciati come no-op semantici
-        return Field(kind="datetime")
+        return Field(kind="datetime", index=index)
 
     @staticmethod
-    def ForeignKey(to: type, on_delete: str = "cascade") -> Field:
-        # on_delete non implementato nell'MVP
-        return Field(kind="fk", to=to)
+    def ForeignKey(to: type | str, on_delete: str = "cascade", index: bool = True, related_name: str | None = None) -> Field:
+        # on_delete non implementato nell'MVP; le FK sono indicizzate di default
+        return Field(kind="fk", to=to, index=index, related_name=related_name)
 
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Iterable, List, Sequence, Tuple, Type
+
+from . import lookups
+from .fields import Field, Index
+
+logger = logging.getLogger("weblib.orm")
+
+
+def resolve(model: Type, table: str, fields: Sequence[Tuple[str, Field]]) -> List[Index]:
+    """Indici del modello: campi con `index=True` più `Meta.indexes`, con nome assegnato."""
+    # pk e campi unique sono già indicizzati dal vincolo
+    declared: List[Index] = [Index(name) for name, f in fields if f.index and not f.pk and not f.unique]
+    declared.extend(getattr(getattr(model, "Meta", object), "indexes", None) or [])
+    names = {n for n, _ in fields}
+    out: List[Index] = []
+    for ix in declared:
+        unknown = [c for c in ix.columns if c not in names]
+        if unknown:
+            raise ValueError(f"Index su colonne inesistenti in {table!r}: {', '.join(unknown)}")
+        name = ix.name or ("ux_" if ix.unique else "ix_") + table + "_" + "_".join(ix.columns)
+        out.append(Index(*ix.columns, name=name, unique=ix.unique, where=ix.where))
+    return out
+
+
+def uncovered(mi: Any, columns: Iterable[str]) -> List[str]:
+    """Colonne filtrate che nessun indice può usare (lista vuota se coperte).
+
+    Un indice copre il filtro se la sua prima colonna è tra quelle filtrate
+    (regola del prefisso sinistro); contano pk, campi `unique` e indici
+    dichiarati. Gli indici parziali non sono considerati: il loro uso dipende
+    dal predicato. Accetta anche chiavi con lookup (`age__gt`).
+    """
+    cols = [lookups.split(c)[0] for c in columns]
+    if not cols:
+        return []
+    leading = {mi.pk} if mi.pk else set()
+    leading.update(name for name, f in mi.fields if f.unique)
+    leading.update(ix.columns[0] for ix in mi.indexes if not ix.where)
+    if any(c in leading for c in cols):
+        return []
+    return cols
+
+
+def warn_uncovered(mi: Any, columns: Iterable[str]) -> None:
+    # Chiamato solo quando l'SQL di una forma di query viene generato (poi è in cache)
+    missing = uncovered(mi, columns)
+    if missing:
+        logger.warning("query su %s filtra %s senza indice: full table scan", mi.table, ", ".join(missing))
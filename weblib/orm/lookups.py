@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+# indice 1-based del parametro -> segnaposto del driver ("?", "$1", "%s")
+Placeholder = Callable[[int], str]
+
+Where = Sequence[Tuple[str, Any]]
+
+_COMPARE = {"exact": "=", "ne": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_LIKE = {"startswith": "{}%", "endswith": "%{}", "contains": "%{}%"}
+LOOKUPS = frozenset(_COMPARE) | frozenset(_LIKE) | {"in", "isnull"}
+
+
+def split(key: str) -> Tuple[str, str]:
+    """`"age__gt"` -> `("age", "gt")`; senza suffisso noto il lookup è `exact`."""
+    column, sep, op = key.rpartition("__")
+    if sep and op in LOOKUPS:
+        return column, op
+    return key, "exact"
+
+
+def shape(where: Where, in_array: bool = False) -> Tuple[Any, ...]:
+    """Chiave di cache dell'SQL: le parti del filtro che cambiano il testo della query."""
+    out: List[Any] = []
+    for key, value in where:
+        op = split(key)[1]
+        if op == "in" and not in_array:
+            out.append((key, len(value)))
+        elif op == "isnull":
+            out.append((key, bool(value)))
+        else:
+            out.append(key)
+    return tuple(out)
+
+
+def params(where: Where, in_array: bool = False) -> List[Any]:
+    """Valori dei segnaposto, nello stesso ordine di `compile_where`."""
+    out: List[Any] = []
+    for key, value in where:
+        op = split(key)[1]
+        if op == "in":
+            if in_array:
+                out.append(list(value))
+            else:
+                out.extend(value)
+        elif op in _LIKE:
+            out.append(_LIKE[op].format(_escape_like(str(value))))
+        elif op != "isnull":
+            out.append(value)
+    return out
+
+
+def compile_where(
+    columns: Iterable[str], where: Where, ph: Placeholder, start: int = 1, in_array: bool = False, qualify: str = ""
+) -> Tuple[str, int]:
+    """Condizioni in AND (senza `where`) e indice del prossimo parametro.
+
+    Le colonne sono validate contro quelle del modello: i nomi finiscono nel
+    testo SQL, i valori mai. Con `in_array` (Postgres) `__in` diventa
+    `= any($n)` con un solo parametro, quindi una sola forma per ogni lunghezza.
+    `qualify` ("tabella.") evita ambiguità quando la query ha dei JOIN.
+    """
+    known = set(columns)
+    parts: List[str] = []
+    n = start
+    for key, value in where:
+        column, op = split(key)
+        if column not in known:
+            raise ValueError(f"Colonna sconosciuta nel filtro: {key!r}")
+        column = qualify + column
+        if op == "isnull":
+            parts.append(f"{column} is {'' if value else 'not '}null")
+        elif op == "in" and in_array:
+            parts.append(f"{column} = any({ph(n)})")
+            n += 1
+        elif op == "in":
+            if not value:
+                parts.append("1=0")
+                continue
+            parts.append(f"{column} in (" + ", ".join(ph(n + i) for i in range(len(value))) + ")")
+            n += len(value)
+        elif op in _LIKE:
+            parts.append(f"{column} like {ph(n)} escape '!'")
+            n += 1
+        else:
+            parts.append(f"{column} {_COMPARE[op]} {ph(n)}")
+            n += 1
+    return " and ".join(parts), n
+
+
+def _escape_like(s: str) -> str:
+    return s.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def order_terms(order: Optional[str]) -> List[Tuple[str, bool]]:
+    """`"created desc, id"` -> `[("created", True), ("id", False)]`."""
+    out: List[Tuple[str, bool]] = []
+    for term in (order or "").split(","):
+        words = term.split()
+        if words:
+            out.append((words[0], len(words) > 1 and words[1].lower() == "desc"))
+    return out
+
+
+def keyset(columns: Sequence[str], order: Optional[str], ph: Placeholder, start: int, qualify: str = "") -> Tuple[str, int]:
+    """Condizione di keyset pagination: le righe dopo il cursore nell'ordinamento.
+
+    `(a, b) > (?, ?)` usa il confronto tra tuple, servito dall'indice su
+    `(a, b)`; le colonne devono avere tutte la stessa direzione.
+    """
+    directions = dict(order_terms(order))
+    desc = {directions.get(c, False) for c in columns}
+    if len(desc) > 1:
+        raise ValueError("after(): le colonne del cursore devono avere la stessa direzione di ordinamento")
+    cmp = "<" if desc.pop() else ">"
+    phs = [ph(start + i) for i in range(len(columns))]
+    if len(columns) == 1:
+        return f"{qualify}{columns[0]} {cmp} {phs[0]}", start + 1
+    return "(" + ", ".join(qualify + c for c in columns) + f") {cmp} (" + ", ".join(phs) + ")", start + len(columns)
+
+
+def where_clause(mi: Any, where: Where, ph: Placeholder, in_array: bool = False) -> str:
+    cond, _ = compile_where([n for n, _ in mi.fields], where, ph, 1, in_array)
+    return f" where {cond}" if cond else ""
+
+
+def select_sql(
+    mi: Any,
+    where: Where,
+    ph: Placeholder,
+    order: Optional[str] = None,
+    limit: bool = False,
+    only: Sequence[str] = (),
+    offset: bool = False,
+    after: Sequence[str] = (),
+    in_array: bool = False,
+    unlimited: str = "all",
+    joins: Sequence[Tuple[str, Any]] = (),
+) -> str:
+    """SELECT completo; `limit`/`offset` indicano solo la presenza (i valori sono parametri).
+
+    `unlimited` è il limite da usare quando c'è solo l'offset (`-1` in SQLite,
+    il massimo BIGINT UNSIGNED in MySQL). `joins` sono coppie (colonna FK,
+    `_ModelInfo` collegato) per select_related: LEFT JOIN con le colonne del
+    modello collegato in coda, con alias `r<n>__<colonna>`.
+    """
+    names = [n for n, _ in mi.fields]
+    unknown = [c for c in only if c not in names]
+    if unknown:
+        raise ValueError(f"only(): colonne sconosciute: {', '.join(unknown)}")
+    q = f"{mi.table}." if joins else ""
+    cond, n = compile_where(names, where, ph, 1, in_array, q)
+    if after:
+        ks, n = keyset(after, order, ph, n, q)
+        cond = f"{cond} and {ks}" if cond else ks
+    if joins:
+        select = [q + c for c in (only or names)]
+        source = mi.table
+        for k, (column, target) in enumerate(joins):
+            select.extend(f"r{k}.{c} as r{k}__{c}" for c, _ in target.fields)
+            source += f" left join {target.table} r{k} on r{k}.{target.pk} = {q}{column}"
+        if order:
+            order = ", ".join(f"{q + c if c in names else c}{' desc' if desc else ''}" for c, desc in order_terms(order))
+    else:
+        select = list(only) or ["*"]
+        source = mi.table
+    sql = f"select {', '.join(select)} from {source}" + (f" where {cond}" if cond else "")
+    if order:
+        sql += f" order by {order}"
+    if limit:
+        sql += f" limit {ph(n)}"
+        n += 1
+    elif offset:
+        sql += f" limit {unlimited}"
+    if offset:
+        sql += f" offset {ph(n)}"
+    return sql
+
+
+def select_params(where: Where, limit: Optional[int], offset: Optional[int], after: Sequence[Any] = (), in_array: bool = False) -> List[Any]:
+    out = params(where, in_array)
+    out.extend(after)
+    if limit is not None:
+        out.append(int(limit))
+    if offset is not None:
+        out.append(int(offset))
+    return out
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import weakref
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, MutableMapping, Optional
+
+logger = logging.getLogger("weblib.orm")
+
+# limiti superiori dei bucket in millisecondi (l'ultimo bucket raccoglie il resto)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# forme di query oltre questo numero finiscono in OTHER
+MAX_SHAPES = 512
+OTHER = "<altre>"
+
+
+class Histogram:
+    """Conteggi per bucket esponenziali: memoria costante, percentili approssimati al bucket."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float:
+        # limite superiore del bucket che contiene il q-esimo valore (il massimo per l'ultimo)
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i], self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max, 3),
+            "buckets": {str(b): n for b, n in zip(BUCKETS_MS + ("inf",), self.counts) if n},
+        }
+
+
+class PoolStats:
+    """Metriche di un pool: attesa per ottenere una connessione, connessioni in uso e in coda, età.
+
+    `weak=False` per connessioni che non supportano weakref (sqlite3): il
+    pool deve allora chiamare `forget()` quando le chiude.
+    """
+
+    def __init__(self, weak: bool = True) -> None:
+        self.acquire = Histogram()
+        self.in_use = 0
+        self.waiting = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self._born: MutableMapping[Any, float] = weakref.WeakKeyDictionary() if weak else {}
+
+    @asynccontextmanager
+    async def acquiring(self, cm: AsyncContextManager[Any], timeout: Optional[float] = None) -> AsyncIterator[Any]:
+        """Entra in `cm` (acquire del driver, lock o semaforo) misurando l'attesa.
+
+        Oltre `timeout` secondi solleva TimeoutError con lo stato del pool.
+        """
+        self.waiting += 1
+        t0 = time.perf_counter()
+        try:
+            if timeout is None:
+                value = await cm.__aenter__()
+            else:
+                try:
+                    value = await asyncio.wait_for(cm.__aenter__(), timeout)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    raise TimeoutError(
+                        f"nessuna connessione libera entro {timeout}s ({self.in_use} in uso, {self.waiting - 1} in attesa)"
+                    ) from None
+        finally:
+            self.waiting -= 1
+        self.acquire.observe((time.perf_counter() - t0) * 1000)
+        self.in_use += 1
+        try:
+            yield value
+        except BaseException as e:
+            if not await cm.__aexit__(type(e), e, e.__traceback__):
+                raise
+        else:
+            await cm.__aexit__(None, None, None)
+        finally:
+            self.in_use -= 1
+
+    def seen(self, conn: Any) -> float:
+        """Età in secondi di `conn`, registrata al primo utilizzo."""
+        now = time.monotonic()
+        return now - self._born.setdefault(conn, now)
+
+    def expired(self, conn: Any, max_lifetime: Optional[float]) -> bool:
+        if max_lifetime is None or self.seen(conn) < max_lifetime:
+            return False
+        self.recycled += 1
+        self.forget(conn)
+        return True
+
+    def forget(self, conn: Any) -> None:
+        self._born.pop(conn, None)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        ages = list(self._born.values())
+        return {
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "timeouts": self.timeouts,
+            "connections": len(ages),
+            "recycled": self.recycled,
+            "oldest_s": round(now - min(ages), 1) if ages else 0.0,
+            "acquire": self.acquire.stats(),
+        }
+
+
+class QueryStats:
+    """Latenza per forma di query (il testo SQL: i valori sono sempre parametri) e log delle query lente."""
+
+    def __init__(self, slow_query_ms: Optional[float] = None) -> None:
+        self.slow_query_ms = slow_query_ms
+        self._shapes: Dict[str, Histogram] = {}
+
+    def observe(self, sql: str, seconds: float) -> None:
+        ms = seconds * 1000
+        hist = self._shapes.get(sql)
+        if hist is None:
+            key = sql if len(self._shapes) < MAX_SHAPES else OTHER
+            hist = self._shapes.get(key)
+            if hist is None:
+                hist = self._shapes[key] = Histogram()
+        hist.observe(ms)
+        if self.slow_query_ms is not None and ms >= self.slow_query_ms:
+            logger.warning("query lenta (%.1f ms): %s", ms, sql)
+
+    def clear(self) -> None:
+        self._shapes.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        # le forme più costose per prime
+        ranked = sorted(self._shapes.items(), key=lambda kv: kv[1].total, reverse=True)
+        return {sql: hist.stats() for sql, hist in ranked}
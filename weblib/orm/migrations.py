@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Tabella che registra le versioni applicate
+MIGRATIONS_TABLE = "weblib_migrations"
+
+_FILE_RE = re.compile(r"^(\d{4,})_([\w-]+)\.sql$")
+
+
+@dataclass
+class LiveTable:
+    """Schema letto dal database: colonna -> tipo (normalizzato dal dialetto) e nomi degli indici."""
+
+    columns: Dict[str, str]
+    indexes: Set[str] = field(default_factory=set)
+
+
+def diff(models: Iterable[Any], live: Dict[str, LiveTable], dialect: Any) -> List[str]:
+    """Confronta i `_ModelInfo` con lo schema live e restituisce il DDL necessario.
+
+    Le colonne presenti solo nel database non vengono mai rimosse: diventano
+    commenti nel file di migrazione, da gestire a mano.
+    """
+    out: List[str] = []
+    for mi in models:
+        table = live.get(mi.table)
+        if table is None:
+            out.extend(dialect.create_table(mi))
+            continue
+        declared = set()
+        for name, f in mi.fields:
+            declared.add(name)
+            live_type = table.columns.get(name)
+            if live_type is None:
+                out.extend(dialect.add_column(mi.table, name, f))
+            elif live_type != dialect.column_type(f):
+                out.extend(dialect.alter_column(mi.table, name, f, live_type))
+        for ix in mi.indexes:
+            if ix.name not in table.indexes:
+                out.append(dialect.index(mi, ix))
+        for name in table.columns:
+            if name not in declared:
+                out.append(f"-- {mi.table}.{name}: colonna non più nel modello (non rimossa automaticamente)")
+    return out
+
+
+def is_statement(sql: str) -> bool:
+    return bool(sql.strip()) and not sql.lstrip().startswith("--")
+
+
+# --- file di migrazione ----------------------------------------------------
+
+
+def list_migrations(directory: str) -> List[Tuple[str, str]]:
+    """(versione, path) dei file `NNNN_nome.sql` nella directory, in ordine."""
+    if not os.path.isdir(directory):
+        return []
+    found = []
+    for entry in os.listdir(directory):
+        if _FILE_RE.match(entry):
+            found.append((entry[: -len(".sql")], os.path.join(directory, entry)))
+    return sorted(found)
+
+
+def read_statements(path: str) -> List[str]:
+    """Statement di un file di migrazione (uno o più righe, terminati da `;` a fine riga)."""
+    statements: List[str] = []
+    buf: List[str] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stripped = line.strip()
+            if not buf and (not stripped or stripped.startswith("--")):
+                continue
+            buf.append(line.rstrip("\n"))
+            if stripped.endswith(";"):
+                statements.append("\n".join(buf).strip()[:-1].rstrip())
+                buf = []
+    if buf:
+        statements.append("\n".join(buf).strip())
+    return statements
+
+
+def write_migration(directory: str, name: str, statements: List[str], dialect: str) -> str:
+    existing = list_migrations(directory)
+    number = int(existing[-1][0].split("_", 1)[0]) + 1 if existing else 1
+    slug = re.sub(r"[^\w-]+", "_", name).strip("_") or "auto"
+    version = f"{number:04d}_{slug}"
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, version + ".sql")
+    now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+    lines = [f"-- weblib migration {version} ({dialect})", f"-- generata il {now}", ""]
+    for sql in statements:
+        lines.append(sql if not is_statement(sql) else sql.rstrip(";") + ";")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+# --- API ad alto livello (usata anche da `weblib migrate`) ------------------
+
+
+async def pending_migrations(orm: Any, directory: str = "migrations") -> List[Tuple[str, str]]:
+    applied = await orm._applied_migrations()
+    return [(v, p) for v, p in list_migrations(directory) if v not in applied]
+
+
+async def make_migration(orm: Any, directory: str = "migrations", name: str = "auto") -> Optional[str]:
+    """Scrive un nuovo file con il DDL che porta il database allo stato dei modelli.
+
+    Restituisce il path del file, o None se lo schema è già allineato.
+    """
+    pending = await pending_migrations(orm, directory)
+    if pending:
+        raise RuntimeError("Migrazioni non ancora applicate: " + ", ".join(v for v, _ in pending))
+    statements = diff(orm._models.values(), await orm.introspect(), orm.dialect)
+    if not any(is_statement(s) for s in statements):
+        return None
+    return write_migration(directory, name, statements, orm.dialect.name)
+
+
+async def apply_migrations(orm: Any, directory: str = "migrations") -> List[str]:
+    """Applica in ordine i file non ancora registrati; restituisce le versioni applicate."""
+    done: List[str] = []
+    for version, path in await pending_migrations(orm, directory):
+        await orm._apply_migration(version, read_statements(path))
+        done.append(version)
+    return done
+
+
+async def migration_status(orm: Any, directory: str = "migrations") -> List[Tuple[str, bool]]:
+    applied = await orm._applied_migrations()
+    return [(v, v in applied) for v, _ in list_migrations(directory)]
@@ -1,11 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import re
+import time
+import weakref
+from collections import OrderedDict
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
-from typing import Any, AsyncContextManager, Dict, Iterable, List, Optional, Tuple, Type
+from dataclasses import dataclass, field
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
 
-from .fields import Field
+from . import bulk, indexes, lookups, metrics, migrations, relations, transactions
+from .fields import Field, Index
+from .records import Record, record_class
+from .replicas import ReplicaNode, Replicas, replica_nodes
+from .resultcache import ResultCache
+from .singleflight import SingleFlight
+from .sqlcache import SQLCache
+
+T = TypeVar("T")
 
 
 def _sql_type_pg(f: Field) -> str:
@@ -27,6 +39,8 @@ class _ModelInfo:
     table: str
     fields: List[Tuple[str, Field]]  # (name, field)
     pk: Optional[str]
+    record: Optional[type] = None  # classe Record generata (vedi records.record_class)
+    indexes: List[Index] = field(default_factory=list)
 
 
 def _introspect_model(model: Type) -> _ModelInfo:
@@ -43,7 +57,7 @@ def _introspect_model(model: Type) -> _ModelInfo:
             if n == "id" and f.kind == "int":
                 pk_name = n
                 break
-    return _ModelInfo(table=table, fields=names_fields, pk=pk_name)
+    return _ModelInfo(table=table, fields=names_fields, pk=pk_name, indexes=indexes.resolve(model, table, names_fields))
 
 
 def _create_table_sql(mi: _ModelInfo) -> str:
@@ -61,10 +75,79 @@ def _create_table_sql(mi: _ModelInfo) -> str:
     return f"create table if not exists {mi.table} (" + ", ".join(cols) + ")"
 
 
+def _schema_sql(mi: _ModelInfo) -> List[str]:
+    # Tabella + indici dichiarati; senza CONCURRENTLY: girano anche dentro una transazione
+    return [_create_table_sql(mi)] + [_DIALECT.index(mi, ix, concurrently=False) for ix in mi.indexes]
+
+
+_CONCURRENTLY = re.compile(r"\bconcurrently\b", re.I)
+
+# tipi di _sql_type_pg -> information_schema.columns.data_type
+_PG_DATA_TYPES = {
+    "INTEGER": "integer",
+    "BOOLEAN": "boolean",
+    "TEXT": "text",
+    "TIMESTAMPTZ": "timestamp with time zone",
+}
+
+
+class _PgDialect:
+    name = "postgres"
+
+    def create_table(self, mi: _ModelInfo) -> List[str]:
+        return _schema_sql(mi)
+
+    def column_type(self, f: Field) -> str:
+        t = _sql_type_pg(f)
+        return _PG_DATA_TYPES.get(t, t.lower())
+
+    def add_column(self, table: str, name: str, f: Field) -> List[str]:
+        if f.pk:
+            return [f"-- {table}.{name}: aggiunta di una primary key a tabella esistente da gestire a mano"]
+        # senza DEFAULT l'ADD COLUMN è solo metadati (nessuna riscrittura della tabella)
+        out = [f"alter table {table} add column {name} {_sql_type_pg(f)}"]
+        if f.unique:
+            out.append(self.create_index(table, f"ux_{table}_{name}", [name], unique=True))
+        return out
+
+    def alter_column(self, table: str, name: str, f: Field, live_type: str) -> List[str]:
+        t = _sql_type_pg(f)
+        return [
+            f"-- {table}.{name}: {live_type} -> {t} (riscrive la tabella con lock esclusivo)",
+            f"alter table {table} alter column {name} type {t} using {name}::{t}",
+        ]
+
+    def create_index(
+        self, table: str, name: str, columns: List[str], unique: bool = False, where: Optional[str] = None, concurrently: bool = True
+    ) -> str:
+        # CONCURRENTLY: nessun lock sulle scritture durante la build dell'indice
+        mode = "concurrently " if concurrently else ""
+        sql = f"create {'unique ' if unique else ''}index {mode}if not exists {name} on {table} (" + ", ".join(columns) + ")"
+        return sql + (f" where {where}" if where else "")
+
+    def index(self, mi: _ModelInfo, ix: Index, concurrently: bool = True) -> str:
+        return self.create_index(mi.table, ix.name, list(ix.columns), ix.unique, ix.where, concurrently)
+
+
+_DIALECT = _PgDialect()
+
+
 class _PgPool:
-    def __init__(self, dsn: str):
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+    ):
         self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime  # secondi; poi la connessione è chiusa e il pool ne apre una nuova
         self.pool = None  # type: ignore[assignment]
+        self.metrics = metrics.PoolStats()
 
     async def ensure(self):
         if self.pool is None:
@@ -72,39 +155,289 @@ class _PgPool:
                 import asyncpg  # type: ignore
             except Exception as e:
                 raise RuntimeError("asyncpg non installato. Esegui: pip install asyncpg") from e
-            self.pool = await asyncpg.create_pool(self.dsn, min_size=1, max_size=10)
+            self.pool = await asyncpg.create_pool(self.dsn, min_size=self.min_size, max_size=self.max_size)
         return self.pool
 
     @asynccontextmanager
     async def acquire(self):
         pool = await self.ensure()
-        async with pool.acquire() as conn:  # type: ignore[attr-defined]
-            yield conn
+        async with self.metrics.acquiring(pool.acquire(), self.acquire_timeout) as conn:  # type: ignore[attr-defined]
+            raw = getattr(conn, "_con", conn)  # il pool restituisce un proxy della Connection
+            try:
+                yield conn
+            finally:
+                if self.metrics.expired(raw, self.max_lifetime):
+                    # asyncpg sostituisce le connessioni chiuse al prossimo acquire
+                    await raw.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"min_size": self.min_size, "max_size": self.max_size, **self.metrics.stats()}
+
+
+class _PgStatements:
+    """PreparedStatement asyncpg tenuti per connessione (LRU per connessione)."""
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._by_conn: "weakref.WeakKeyDictionary[Any, OrderedDict[str, Any]]" = weakref.WeakKeyDictionary()
+
+    async def get(self, conn: Any, sql: str) -> Any:
+        raw = getattr(conn, "_con", conn)  # il pool restituisce un proxy della Connection
+        stmts = self._by_conn.get(raw)
+        if stmts is None:
+            stmts = self._by_conn[raw] = OrderedDict()
+        stmt = stmts.get(sql)
+        if stmt is not None:
+            self.hits += 1
+            stmts.move_to_end(sql)
+            return stmt
+        self.misses += 1
+        stmt = stmts[sql] = await conn.prepare(sql)
+        if len(stmts) > self.maxsize:
+            stmts.popitem(last=False)
+        return stmt
+
+    def discard(self, conn: Any) -> None:
+        self._by_conn.pop(getattr(conn, "_con", conn), None)
+
+    def clear(self) -> None:
+        self._by_conn.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "connections": len(self._by_conn), "maxsize": self.maxsize}
 
 
 class PostgresORM:
-    def __init__(self, dsn: str) -> None:
-        self._pool = _PgPool(dsn)
+    def __init__(
+        self,
+        dsn: str,
+        sql_cache_size: int = 512,
+        statement_cache_size: int = 256,
+        auto_create: bool = True,
+        check_indexes: bool = False,
+        min_size: int = 1,
+        max_size: int = 10,
+        replicas: Sequence[ReplicaNode] = (),
+        balance: str = "round_robin",
+        read_your_writes: float = 0.0,
+        acquire_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        slow_query_ms: Optional[float] = None,
+        result_cache: Optional[ResultCache] = None,
+        single_flight: bool = False,
+    ) -> None:
+        self._pool = _PgPool(dsn, min_size, max_size, acquire_timeout, max_lifetime)
+        # letture di get/find/Query sulle repliche; scritture e transazioni sul primary
+        self._replicas = Replicas(
+            [_PgPool(*node, acquire_timeout, max_lifetime) for node in replica_nodes(replicas, min_size, max_size)],
+            balance,
+            read_your_writes,
+        )
+        self.queries = metrics.QueryStats(slow_query_ms)
+        # opt-in: risultati di get/find in cache, invalidati dalle scritture sulla stessa tabella
+        self.result_cache = result_cache
+        # opt-in: letture identiche in corso condividono una sola query
+        self.single_flight = SingleFlight() if single_flight else None
         self._models: Dict[Type, _ModelInfo] = {}
         self._ensured: set[str] = set()
+        self._schema_lock = asyncio.Lock()
+        # False (produzione): nessun controllo per chiamata, le tabelle vanno create con bootstrap()/migrate()
+        self.auto_create = auto_create
+        # True (sviluppo): logga i filtri `where` che nessun indice copre
+        self.check_indexes = check_indexes
+        self.sql_cache = SQLCache(sql_cache_size)
+        self._statements = _PgStatements(statement_cache_size)
+        self.dialect = _DIALECT
+        self._tx = transactions.context_var(self)
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        out = {"sql": self.sql_cache.stats(), "statements": self._statements.stats()}
+        if self.result_cache is not None:
+            out["results"] = self.result_cache.stats()
+        return out
+
+    def replica_stats(self) -> Dict[str, Any]:
+        return self._replicas.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool (attesa acquire, connessioni in uso/in coda, età), latenza per forma di query e letture condivise."""
+        out: Dict[str, Any] = {
+            "pools": {"primary": self._pool.stats(), "replicas": [p.stats() for p in self._replicas.pools]},
+            "queries": self.queries.stats(),
+        }
+        if self.single_flight is not None:
+            out["single_flight"] = self.single_flight.stats()
+        return out
+
+    def configure(
+        self,
+        pool_size: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        slow_query_ms: Optional[float] = None,
+    ) -> None:
+        """Regola pool e log delle query lente (vedi `WebAppConfig.db_*`); None lascia il valore attuale."""
+        for pool in [self._pool, *self._replicas.pools]:
+            if pool_size is not None and pool_size != pool.max_size:
+                if pool.pool is not None:
+                    raise RuntimeError("pool_size: il pool è già aperto, configura l'ORM prima dell'avvio")
+                pool.max_size = pool_size
+                pool.min_size = min(pool.min_size, pool_size)
+            if acquire_timeout is not None:
+                pool.acquire_timeout = acquire_timeout
+            if max_lifetime is not None:
+                pool.max_lifetime = max_lifetime
+        if slow_query_ms is not None:
+            self.queries.slow_query_ms = slow_query_ms
+
+    async def _prepared(self, conn: Any, method: str, sql: str, params: List[Any]) -> Any:
+        # Esegue `sql` tramite un PreparedStatement riusato sulla stessa connessione
+        t0 = time.perf_counter()
+        stmt = await self._statements.get(conn, sql)
+        try:
+            return await getattr(stmt, method)(*params)
+        except Exception as e:
+            # lo schema è cambiato dopo la prepare: si riprepara una volta
+            if type(e).__name__ != "InvalidCachedStatementError":
+                raise
+            self._statements.discard(conn)
+            stmt = await self._statements.get(conn, sql)
+            return await getattr(stmt, method)(*params)
+        finally:
+            self.queries.observe(sql, time.perf_counter() - t0)
 
     async def create_database(self):
         # delegato all'istanza del server/utente; non gestito qui
         await self._pool.ensure()
+        for pool in self._replicas.pools:
+            await pool.ensure()
 
     async def drop_database(self):
         # non implementato: operazione distruttiva fuori scope
         pass
 
     @asynccontextmanager
-    async def session(self):
+    async def session(self, readonly: bool = False, table: Optional[str] = None):
+        """Connessione per una query su `table`: letture (`readonly`) su una replica, il resto sul primary."""
+        tx = self._tx.get()
+        if tx is not None:
+            # dentro orm.transaction(): stessa connessione, commit alla fine della transazione
+            if table is not None and not readonly:
+                tx.tables.add(table)
+            yield tx.conn
+            return
+        if readonly:
+            async with self._replicas.reading(table, self._pool) as pool:
+                async with pool.acquire() as conn:
+                    yield conn
+            return
+        try:
+            async with self._pool.acquire() as conn:
+                yield conn
+        finally:
+            if table is not None:
+                await self._written(table)
+
+    async def _written(self, *tables: str) -> None:
+        # scritture confermate: letture al primary (read_your_writes) e risultati in cache da rifare
+        self._replicas.wrote(*tables)
+        if self.single_flight is not None:
+            self.single_flight.wrote(*tables)
+        if self.result_cache is not None:
+            await self.result_cache.invalidate(*tables)
+
+    def _coalesced(self, table: str, key: Tuple[Any, ...], load: Callable[[], Awaitable[T]]) -> Awaitable[T]:
+        # dentro una transazione la lettura deve vedere le scritture non confermate del task: niente condivisione
+        if self.single_flight is None or self._tx.get() is not None:
+            return load()
+        return self.single_flight.do(table, key, load)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[transactions.Transaction]:
+        """`async with orm.transaction():` raggruppa le chiamate del Repository in un solo commit.
+
+        Le operazioni del task corrente usano una sola connessione del
+        primary, letture comprese; un blocco annidato è un savepoint (gestito
+        da asyncpg) e un'eccezione fa rollback del suo livello.
+        """
+        tx = self._tx.get()
+        if tx is not None:
+            async with tx.conn.transaction():
+                yield tx
+            return
         async with self._pool.acquire() as conn:
-            yield conn
+            tx = transactions.Transaction(conn)
+            token = self._tx.set(tx)
+            try:
+                async with conn.transaction():
+                    yield tx
+                await self._written(*tx.tables)
+            finally:
+                self._tx.reset(token)
 
     async def migrate(self):
         async with self.session() as conn:
             for mi in self._models.values():
-                await conn.execute(_create_table_sql(mi))
+                for sql in _schema_sql(mi):
+                    await conn.execute(sql)
+        self._statements.clear()
+
+    async def bootstrap(self, models: Iterable[Type] = ()) -> None:
+        """Crea/verifica una sola volta le tabelle di tutti i modelli registrati (single-flight)."""
+        for model in models:
+            self.repo(model)
+        async with self._schema_lock:
+            pending = [mi for mi in self._models.values() if mi.table not in self._ensured]
+            if not pending:
+                return
+            # connessione propria anche dentro orm.transaction(): un rollback non deve lasciare tabelle segnate
+            async with self._pool.acquire() as conn:
+                for mi in pending:
+                    for sql in _schema_sql(mi):
+                        await conn.execute(sql)
+                    self._ensured.add(mi.table)
+
+    async def introspect(self) -> Dict[str, migrations.LiveTable]:
+        """Schema live dello schema corrente: tabelle, colonne (data_type) e indici."""
+        out: Dict[str, migrations.LiveTable] = {}
+        async with self.session() as conn:
+            for r in await conn.fetch(
+                "select table_name, column_name, data_type from information_schema.columns "
+                "where table_schema = current_schema() order by table_name, ordinal_position"
+            ):
+                out.setdefault(r[0], migrations.LiveTable({})).columns[r[1]] = r[2].lower()
+            for r in await conn.fetch("select tablename, indexname from pg_indexes where schemaname = current_schema()"):
+                if r[0] in out:
+                    out[r[0]].indexes.add(r[1])
+        return out
+
+    async def _applied_migrations(self) -> set[str]:
+        async with self.session() as conn:
+            await conn.execute(
+                f"create table if not exists {migrations.MIGRATIONS_TABLE} (version TEXT PRIMARY KEY, applied_at TIMESTAMPTZ DEFAULT now())"
+            )
+            return {r[0] for r in await conn.fetch(f"select version from {migrations.MIGRATIONS_TABLE}")}
+
+    async def _apply_migration(self, version: str, statements: List[str]) -> None:
+        record = f"insert into {migrations.MIGRATIONS_TABLE} (version) values ($1)"
+        async with self.session() as conn:
+            if any(_CONCURRENTLY.search(sql) for sql in statements):
+                # CREATE INDEX CONCURRENTLY non può girare in una transazione
+                for sql in statements:
+                    await conn.execute(sql)
+                await conn.execute(record, version)
+            else:
+                async with conn.transaction():
+                    for sql in statements:
+                        await conn.execute(sql)
+                    await conn.execute(record, version)
+        self._ensured.clear()
+        self._statements.clear()
+        self.sql_cache.clear()
+        if self.result_cache is not None:
+            await self.result_cache.clear()
 
     def repo(self, model: Type) -> "Repository":
         mi = self._models.get(model)
@@ -117,31 +450,20 @@ class PostgresORM:
     async def _ensure_table(self, mi: _ModelInfo):
         if mi.table in self._ensured:
             return
-        async with self.session() as conn:
-            await conn.execute(_create_table_sql(mi))
-        self._ensured.add(mi.table)
-
-
-@dataclass
-class Record:
-    _repo: "Repository"
-    _data: Dict[str, Any]
-
-    def __getattr__(self, item: str) -> Any:
-        if item in self._data:
-            return self._data[item]
-        raise AttributeError(item)
-
-    def to_dict(self) -> Dict[str, Any]:
-        return dict(self._data)
-
-    async def update(self, **fields) -> "Record":
-        await self._repo.update_one(self._data, fields)
-        self._data.update(fields)
-        return self
-
-    async def delete(self) -> None:
-        await self._repo.delete_one(self._data)
+        tx = self._tx.get()
+        if tx is not None:
+            # DDL transazionale sulla connessione della transazione, senza _schema_lock (la connessione è già presa):
+            # un rollback annulla anche la tabella, quindi si segna alla prima verifica fuori
+            for sql in _schema_sql(mi):
+                await tx.conn.execute(sql)
+            return
+        async with self._schema_lock:
+            if mi.table in self._ensured:
+                return
+            async with self.session() as conn:
+                for sql in _schema_sql(mi):
+                    await conn.execute(sql)
+            self._ensured.add(mi.table)
 
 
 class Query:
@@ -150,10 +472,15 @@ class Query:
         self._where: List[Tuple[str, Any]] = []
         self._order: Optional[str] = None
         self._limit: Optional[int] = None
-
-    def where(self, **eq) -> "Query":
-        for k, v in eq.items():
-            self._where.append((k, v))
+        self._offset: Optional[int] = None
+        self._only: Tuple[str, ...] = ()
+        self._after: List[Tuple[str, Any]] = []
+        self._related: Tuple[str, ...] = ()
+        self._prefetch: Tuple[str, ...] = ()
+
+    def where(self, **filters) -> "Query":
+        """Filtri in AND: `campo=v` o `campo__op=v` (gt, gte, lt, lte, ne, in, startswith, endswith, contains, isnull)."""
+        self._where.extend(filters.items())
         return self
 
     def order(self, expr: str) -> "Query":
@@ -164,89 +491,363 @@ class Query:
         self._limit = n
         return self
 
+    def offset(self, n: int) -> "Query":
+        self._offset = n
+        return self
+
+    def only(self, *columns: str) -> "Query":
+        """Seleziona solo queste colonne; gli altri campi del Record restano non valorizzati."""
+        self._only = columns
+        return self
+
+    def after(self, record: Optional[Record] = None, **cursor) -> "Query":
+        """Keyset pagination: righe successive al cursore secondo `order`.
+
+        Il cursore è `after(created=..., id=...)` oppure l'ultimo Record della
+        pagina precedente (se ne leggono le colonne di `order`, o la pk). Senza
+        `order` si ordina per le colonne del cursore.
+        """
+        if record is not None:
+            columns = [c for c, _ in lookups.order_terms(self._order)] or [self.repo.mi.pk]
+            cursor = {c: getattr(record, c) for c in columns}
+        if not cursor:
+            raise ValueError("after() richiede un Record o almeno una colonna")
+        if self._order is None:
+            self._order = ", ".join(cursor)
+        self._after = list(cursor.items())
+        return self
+
+    def select_related(self, *names: str) -> "Query":
+        """Carica le ForeignKey `names` nella stessa query con un LEFT JOIN (`post.author` diventa il Record)."""
+        self._related = names
+        return self
+
+    def prefetch_related(self, *names: str) -> "Query":
+        """Carica le relazioni `names` con una query `IN (...)` ciascuna dopo quella principale.
+
+        Vale per le ForeignKey del modello e per le relazioni inverse
+        dichiarate con `ForeignKey(..., related_name="posts")`.
+        """
+        self._prefetch = names
+        return self
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            "only": self._only,
+            "offset": self._offset,
+            "after": self._after,
+            "related": self._related,
+            "prefetch": self._prefetch,
+        }
+
     async def all(self) -> List[Record]:
-        return await self.repo.find(self._where, self._order, self._limit)
+        return await self.repo.find(self._where, self._order, self._limit, **self._options())
 
     async def first(self) -> Optional[Record]:
         rows = await self.limit(1).all()
         return rows[0] if rows else None
 
+    async def count(self) -> int:
+        """`select count(*)` con gli stessi filtri, senza leggere le righe."""
+        return await self.repo.count(self._where)
+
+    async def exists(self) -> bool:
+        return await self.repo.exists(self._where)
+
+    def iter(self, batch_size: int = 1000) -> AsyncIterator[Record]:
+        """Itera i risultati a blocchi di `batch_size` righe con un cursore lato server."""
+        return self.repo.iter(self._where, self._order, self._limit, batch_size, **self._options())
+
+    def uncovered(self) -> List[str]:
+        """Colonne del `where` che nessun indice dichiarato copre (controllo statico)."""
+        return indexes.uncovered(self.repo.mi, [k for k, _ in self._where])
+
+    async def explain(self) -> List[str]:
+        """Piano di esecuzione reale (`explain`), una riga per nodo."""
+        return await self.repo.explain(self._where, self._order, self._limit, **self._options())
+
 
 class Repository:
     def __init__(self, orm: PostgresORM, model: Type, mi: _ModelInfo) -> None:
         self.orm = orm
         self.model = model
         self.mi = mi
+        if mi.record is None:
+            mi.record = record_class(model, mi.fields, mi.pk, self)
+        self.record = mi.record
+
+    def _sql(self, key: Tuple[Any, ...], build) -> Any:
+        return self.orm.sql_cache.get((self.model,) + key, build)
 
     async def create(self, **fields) -> Record:
-        await self.orm._ensure_table(self.mi)
-        cols = []
-        vals = []
-        ph = []
-        for name, f in self.mi.fields:
-            if name in fields and not f.pk:
-                cols.append(name)
-                vals.append(fields[name])
-                ph.append(f"${len(vals)}")
-        sql = f"insert into {self.mi.table} (" + ",".join(cols) + ") values (" + ",".join(ph) + ") returning *"
-        async with self.orm.session() as conn:
-            row = await conn.fetchrow(sql, *vals)
-        return Record(self, dict(row))
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+
+        def build() -> Tuple[str, List[str]]:
+            cols = [name for name, f in self.mi.fields if name in fields and not f.pk]
+            ph = [f"${i}" for i in range(1, len(cols) + 1)]
+            return f"insert into {self.mi.table} (" + ",".join(cols) + ") values (" + ",".join(ph) + ") returning *", cols
+
+        sql, cols = self._sql(("insert", tuple(fields)), build)
+        async with self.orm.session(table=self.mi.table) as conn:
+            row = await self.orm._prepared(conn, "fetchrow", sql, [fields[c] for c in cols])
+        return self.record.from_row(row)
+
+    def _filtered(self, op: str, where: Iterable[Tuple[str, Any]] | None, head: str, tail: str = "") -> Tuple[str, List[Any]]:
+        # SQL "<head> from tabella where ...<tail>" in cache per forma dei filtri
+        where = list(where or [])
+
+        def build() -> str:
+            if self.orm.check_indexes:
+                indexes.warn_uncovered(self.mi, [k for k, _ in where])
+            return f"{head} from {self.mi.table}{lookups.where_clause(self.mi, where, _ph, in_array=True)}{tail}"
+
+        return self._sql((op, lookups.shape(where, in_array=True)), build), lookups.params(where, in_array=True)
 
     async def get(self, **filters) -> Optional[Record]:
-        await self.orm._ensure_table(self.mi)
-        where_sql, params = _where_pg(filters)
-        sql = f"select * from {self.mi.table} {where_sql} limit 1"
-        async with self.orm.session() as conn:
-            row = await conn.fetchrow(sql, *params)
-        return Record(self, dict(row)) if row else None
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql, params = self._filtered("get", filters.items(), "select *", " limit 1")
+        if self.orm.result_cache is not None:
+            found = await self.orm.result_cache.records(self, ("get", tuple(filters.items())), lambda: self._fetch(sql, params))
+            return found[0] if found else None
+        row = await self._read("fetchrow", sql, params)
+        return self.record.from_row(row) if row else None
 
     def query(self) -> Query:
         return Query(self)
 
-    async def find(self, where: List[Tuple[str, Any]] | None = None, order: Optional[str] = None, limit: Optional[int] = None) -> List[Record]:
-        await self.orm._ensure_table(self.mi)
-        filters = {k: v for (k, v) in (where or [])}
-        where_sql, params = _where_pg(filters)
-        order_sql = f" order by {order}" if order else ""
-        limit_sql = f" limit {int(limit)}" if limit is not None else ""
-        sql = f"select * from {self.mi.table}{where_sql}{order_sql}{limit_sql}"
-        async with self.orm.session() as conn:
-            rows = await conn.fetch(sql, *params)
-        return [Record(self, dict(r)) for r in rows]
+    def _select(
+        self,
+        where: List[Tuple[str, Any]] | None,
+        order: Optional[str],
+        limit: Optional[int],
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+    ) -> Tuple[str, List[Any]]:
+        where = list(where or [])
+        cursor = [c for c, _ in after]
+        related = tuple(related)
+
+        def build() -> str:
+            if self.orm.check_indexes:
+                indexes.warn_uncovered(self.mi, [k for k, _ in where])
+            return lookups.select_sql(self.mi, where, _ph, order, limit is not None, only, offset is not None, cursor, in_array=True, joins=relations.joins(self, related))
+
+        key = ("select", lookups.shape(where, in_array=True), order, limit is not None, tuple(only), offset is not None, tuple(cursor), related)
+        sql = self._sql(key, build)
+        return sql, lookups.select_params(where, limit, offset, [v for _, v in after], in_array=True)
+
+    async def find(
+        self,
+        where: List[Tuple[str, Any]] | None = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+        prefetch: Sequence[str] = (),
+    ) -> List[Record]:
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql, params = self._select(where, order, limit, only, offset, after, related)
+        if self.orm.result_cache is not None and not related and not prefetch:
+            key = ("find", tuple(where or ()), order, limit, offset, tuple(only), tuple(after))
+            return await self.orm.result_cache.records(self, key, lambda: self._fetch(sql, params, only), only)
+        return await self._fetch(sql, params, only, related, prefetch)
+
+    async def _fetch(
+        self, sql: str, params: List[Any], only: Sequence[str] = (), related: Sequence[str] = (), prefetch: Sequence[str] = ()
+    ) -> List[Record]:
+        rows = await self._read("fetch", sql, params)
+        if related or prefetch:
+            return await relations.load(self, rows, only, related, prefetch)
+        return self.record.from_rows(rows)
+
+    def _read(self, method: str, sql: str, params: List[Any]) -> Awaitable[Any]:
+        # risultato grezzo di asyncpg: con single_flight lo condividono le chiamate identiche in corso
+        async def load() -> Any:
+            async with self.orm.session(readonly=True, table=self.mi.table) as conn:
+                return await self.orm._prepared(conn, method, sql, params)
+
+        return self.orm._coalesced(self.mi.table, (method, sql, *params), load)
+
+    async def count(self, where: List[Tuple[str, Any]] | None = None) -> int:
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql, params = self._filtered("count", where, "select count(*)")
+        return await self._read("fetchval", sql, params)
+
+    async def exists(self, where: List[Tuple[str, Any]] | None = None) -> bool:
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql, params = self._filtered("exists", where, "select 1", " limit 1")
+        return await self._read("fetchval", sql, params) is not None
+
+    async def explain(
+        self,
+        where: List[Tuple[str, Any]] | None = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+        prefetch: Sequence[str] = (),
+    ) -> List[str]:
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql, params = self._select(where, order, limit, only, offset, after, related)
+        async with self.orm.session(readonly=True, table=self.mi.table) as conn:
+            rows = await conn.fetch("explain " + sql, *params)
+        return [r[0] for r in rows]
+
+    async def iter(
+        self,
+        where: List[Tuple[str, Any]] | None = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000,
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+        prefetch: Sequence[str] = (),
+    ) -> AsyncIterator[Record]:
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql, params = self._select(where, order, limit, only, offset, after, related)
+        # i cursori lato server di asyncpg richiedono una transazione
+        async with self.orm.session(readonly=True, table=self.mi.table) as conn:
+            async with conn.transaction():
+                stmt = await self.orm._statements.get(conn, sql)
+                cur = await stmt.cursor(*params)
+                while True:
+                    rows = await cur.fetch(batch_size)
+                    if not rows:
+                        break
+                    if related or prefetch:
+                        records = await relations.load(self, rows, only, related, prefetch)
+                    else:
+                        records = self.record.from_rows(rows)
+                    for rec in records:
+                        yield rec
 
     async def update_one(self, data: Dict[str, Any], changes: Dict[str, Any]) -> None:
         if not self.mi.pk or self.mi.pk not in data:
             raise ValueError("Update requires primary key on record")
-        await self.orm._ensure_table(self.mi)
-        sets = []
-        params: List[Any] = []
-        for k, v in changes.items():
-            params.append(v)
-            sets.append(f"{k}=${len(params)}")
-        params.append(data[self.mi.pk])
-        sql = f"update {self.mi.table} set {', '.join(sets)} where {self.mi.pk}=${len(params)}"
-        async with self.orm.session() as conn:
-            await conn.execute(sql, *params)
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+
+        def build() -> str:
+            sets = [f"{k}=${i}" for i, k in enumerate(changes, 1)]
+            return f"update {self.mi.table} set {', '.join(sets)} where {self.mi.pk}=${len(sets) + 1}"
+
+        sql = self._sql(("update", tuple(changes)), build)
+        params = list(changes.values()) + [data[self.mi.pk]]
+        async with self.orm.session(table=self.mi.table) as conn:
+            await self.orm._prepared(conn, "fetch", sql, params)
 
     async def delete_one(self, data: Dict[str, Any]) -> None:
         if not self.mi.pk or self.mi.pk not in data:
             raise ValueError("Delete requires primary key on record")
-        await self.orm._ensure_table(self.mi)
-        sql = f"delete from {self.mi.table} where {self.mi.pk}=$1"
-        async with self.orm.session() as conn:
-            await conn.execute(sql, data[self.mi.pk])
-
-
-def _where_pg(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
-    if not filters:
-        return "", []
-    parts = []
-    params: List[Any] = []
-    for k, v in filters.items():
-        params.append(v)
-        parts.append(f"{k}=${len(params)}")
-    return " where " + " and ".join(parts), params
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        sql = self._sql(("delete",), lambda: f"delete from {self.mi.table} where {self.mi.pk}=$1")
+        async with self.orm.session(table=self.mi.table) as conn:
+            await self.orm._prepared(conn, "fetch", sql, [data[self.mi.pk]])
+
+    async def bulk_create(self, rows: bulk.Rows, batch_size: int = bulk.BATCH_SIZE, returning: bool = True) -> List[Any]:
+        """Inserisce righe (dict, anche da un async iterable) a blocchi via COPY.
+
+        Senza `returning` i blocchi vanno direttamente in tabella con
+        `copy_records_to_table`; con `returning` (e pk generata dal DB) passano
+        da una tabella temporanea e `insert ... select ... returning`, così le
+        pk tornano nell'ordine delle righe.
+        """
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        pks: List[Any] = []
+        cols: List[str] = []
+        for_pk = False
+        async for batch in bulk.batches(rows, batch_size):
+            if not cols:
+                cols = bulk.columns(self.mi, batch[0])
+                for_pk = returning and bulk.auto_pk(self.mi, cols)
+            records = bulk.values(self.mi, batch, cols)
+            async with self.orm.session(table=self.mi.table) as conn:
+                if not for_pk:
+                    await conn.copy_records_to_table(self.mi.table, records=records, columns=cols)
+                    continue
+                async with conn.transaction():
+                    stage = await self._stage(conn, cols, records)
+                    sql = (
+                        f"insert into {self.mi.table} (" + ",".join(cols) + ") "
+                        f"select " + ",".join(cols) + f" from {stage} order by _wl_ord returning {self.mi.pk}"
+                    )
+                    pks.extend(r[0] for r in await conn.fetch(sql))
+        return pks
+
+    async def bulk_upsert(
+        self,
+        rows: bulk.Rows,
+        conflict: Optional[List[str]] = None,
+        update: Optional[List[str]] = None,
+        batch_size: int = bulk.BATCH_SIZE,
+    ) -> int:
+        """Insert-or-update a blocchi: COPY in tabella temporanea + `on conflict do update`.
+
+        `conflict` sono le colonne univoche (default: pk); `update` le colonne da
+        sovrascrivere (default: tutte le altre). Restituisce le righe inviate.
+        """
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        total = 0
+        sql: Optional[str] = None
+        cols: List[str] = []
+        async for batch in bulk.batches(rows, batch_size):
+            if sql is None:
+                cols = bulk.columns(self.mi, batch[0])
+                target, changed = bulk.upsert_columns(self.mi, cols, conflict, update)
+                action = "do update set " + ",".join(f"{c}=excluded.{c}" for c in changed) if changed else "do nothing"
+                sql = (
+                    f"insert into {self.mi.table} (" + ",".join(cols) + ") "
+                    f"select " + ",".join(cols) + f" from {_stage_name(self.mi)} order by _wl_ord "
+                    f"on conflict (" + ",".join(target) + f") {action}"
+                )
+            records = bulk.values(self.mi, batch, cols)
+            async with self.orm.session(table=self.mi.table) as conn:
+                async with conn.transaction():
+                    await self._stage(conn, cols, records)
+                    await conn.execute(sql)
+            total += len(records)
+        return total
+
+    async def _stage(self, conn: Any, cols: List[str], records: List[Tuple[Any, ...]]) -> str:
+        # Tabella temporanea con gli stessi tipi di colonna, eliminata al commit; dentro
+        # orm.transaction() il commit arriva dopo più blocchi, quindi si ricrea ogni volta
+        stage = _stage_name(self.mi)
+        await conn.execute(
+            f"drop table if exists {stage}; "
+            f"create temp table {stage} on commit drop as "
+            f"select " + ",".join(cols) + f", 0::bigint as _wl_ord from {self.mi.table} with no data"
+        )
+        await conn.copy_records_to_table(
+            stage, records=[r + (i,) for i, r in enumerate(records)], columns=list(cols) + ["_wl_ord"]
+        )
+        return stage
+
+
+def _stage_name(mi: _ModelInfo) -> str:
+    return f"_wl_stage_{mi.table}"
+
+
+def _ph(i: int) -> str:
+    # segnaposto dell'i-esimo parametro (vedi lookups.Placeholder)
+    return f"${i}"
 
 
 def _bind_model_helpers(orm: PostgresORM, model: Type) -> None:
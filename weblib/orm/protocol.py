@@ -7,6 +7,7 @@ class ORM(Protocol):
     async def create_database(self): ...
     async def drop_database(self): ...
     def session(self) -> AsyncContextManager["Session"]: ...
+    def transaction(self) -> AsyncContextManager[Any]: ...
     async def migrate(self): ...
     def repo(self, model: type["Model"]) -> "Repository": ...
 
@@ -14,6 +15,7 @@ class ORM(Protocol):
 class Model:
     class Meta:
         table_name: str | None = None
+        indexes: list = []  # weblib.orm.Index(...)
 
     @classmethod
     async def create(cls, **fields): ...
@@ -31,20 +33,20 @@ class Model:
 
 class fields:
     @staticmethod
-    def Int(pk: bool = False, default: int | None = None): ...
+    def Int(pk: bool = False, default: int | None = None, index: bool = False): ...
 
     @staticmethod
-    def Str(max_length: int | None = None, unique: bool = False): ...
+    def Str(max_length: int | None = None, unique: bool = False, index: bool = False): ...
 
     @staticmethod
     def Text(): ...
 
     @staticmethod
-    def Bool(default: bool = False): ...
+    def Bool(default: bool = False, index: bool = False): ...
 
     @staticmethod
-    def Datetime(auto_now: bool = False, auto_now_add: bool = False): ...
+    def Datetime(auto_now: bool = False, auto_now_add: bool = False, index: bool = False): ...
 
     @staticmethod
-    def ForeignKey(to: type[Model], on_delete: str = "cascade"): ...
+    def ForeignKey(to: type[Model] | str, on_delete: str = "cascade", index: bool = True, related_name: str | None = None): ...
 
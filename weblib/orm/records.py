@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Segna una colonna del modello che la riga non riporta (es. `create` su SQLite)
+_MISSING: Any = type("_Missing", (), {"__repr__": lambda self: "<missing>", "__slots__": ()})()
+
+
+class Record:
+    """Base delle classi Record per modello generate da `record_class`.
+
+    I valori stanno in una tupla ordinata come i campi del modello; ogni
+    campo è una property che legge il suo slot, così l'accesso agli
+    attributi non passa da `__getattr__`. Le colonne che non sono campi del
+    modello finiscono in `_extra`; le relazioni caricate da
+    select_related/prefetch_related stanno in `_rel`, condiviso da tutti i
+    record di una query (vedi relations.py).
+    """
+
+    __slots__ = ("_values", "_extra", "_rel")
+
+    _fields: Tuple[str, ...] = ()
+    _index: Dict[str, int] = {}
+    _pk: Optional[str] = None
+    _repo: Any = None
+
+    def __init__(self, values: Tuple[Any, ...], extra: Optional[Dict[str, Any]] = None) -> None:
+        self._values = values
+        self._extra = extra
+        self._rel: Optional[Dict[str, Tuple[Dict[Any, Any], int, Any]]] = None
+
+    def __getattr__(self, item: str) -> Any:
+        # solo per colonne mancanti, colonne fuori dal modello e relazioni
+        extra = self._extra
+        if extra is not None and item in extra:
+            return extra[item]
+        rel = self._rel
+        if rel is not None and item in rel:
+            found, i, default = rel[item]
+            return found.get(self._values[i], default)
+        raise AttributeError(item)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values == other._values and self._extra == other._extra  # type: ignore[attr-defined]
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def to_dict(self) -> Dict[str, Any]:
+        if _MISSING in self._values:
+            data = {k: v for k, v in zip(self._fields, self._values) if v is not _MISSING}
+        else:
+            data = dict(zip(self._fields, self._values))
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def _key(self) -> Dict[str, Any]:
+        pk = self._pk
+        if pk is None:
+            return {}
+        v = self._values[self._index[pk]]
+        return {} if v is _MISSING else {pk: v}
+
+    async def update(self, **fields) -> "Record":
+        await self._repo.update_one(self._key(), fields)
+        values = list(self._values)
+        for k, v in fields.items():
+            i = self._index.get(k)
+            if i is None:
+                self._extra = {**(self._extra or {}), k: v}
+            else:
+                values[i] = v
+        self._values = tuple(values)
+        return self
+
+    async def delete(self) -> None:
+        await self._repo.delete_one(self._key())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Record":
+        values = tuple(data.get(f, _MISSING) for f in cls._fields)
+        extra = {k: v for k, v in data.items() if k not in cls._index} or None
+        return cls(values, extra)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Any]) -> List["Record"]:
+        """Record dalle righe del driver (sqlite3.Row, asyncpg Record o dict).
+
+        L'ordine delle colonne si legge una volta dalla prima riga: se
+        coincide con il modello, i valori della riga diventano la tupla del
+        record così come sono.
+        """
+        if not rows:
+            return []
+        first = rows[0]
+        keys = tuple(first.keys())
+        as_dict = isinstance(first, dict)
+        if keys == cls._fields:
+            if as_dict:
+                return [cls(tuple(r.values())) for r in rows]
+            return [cls(tuple(r)) for r in rows]
+        return cls.from_tuples(keys, [tuple(r.values()) if as_dict else tuple(r) for r in rows])
+
+    @classmethod
+    def from_tuples(cls, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> List["Record"]:
+        """Record da tuple di valori disposte come `columns` (es. una parte di una riga di JOIN)."""
+        columns = tuple(columns)
+        if columns == cls._fields:
+            return [cls(vals) for vals in rows]
+        pick = [columns.index(f) if f in columns else -1 for f in cls._fields]
+        extra_at = [(i, k) for i, k in enumerate(columns) if k not in cls._index]
+        out: List[Record] = []
+        for vals in rows:
+            extra = {k: vals[i] for i, k in extra_at} or None
+            out.append(cls(tuple(vals[i] if i >= 0 else _MISSING for i in pick), extra))
+        return out
+
+    @classmethod
+    def from_row(cls, row: Any) -> "Record":
+        return cls.from_rows([row])[0]
+
+
+def _field_property(name: str, i: int) -> property:
+    def get(self: Record) -> Any:
+        v = self._values[i]
+        if v is _MISSING:
+            return self.__getattr__(name)
+        return v
+
+    get.__name__ = name
+    return property(get)
+
+
+def _relation_property(name: str, i: int) -> property:
+    # campo FK con il nome della relazione: il record collegato se caricato, altrimenti la chiave
+    def get(self: Record) -> Any:
+        rel = self._rel
+        if rel is not None and name in rel:
+            found, _, default = rel[name]
+            return found.get(self._values[i], default)
+        v = self._values[i]
+        if v is _MISSING:
+            return self.__getattr__(name)
+        return v
+
+    get.__name__ = name
+    return property(get)
+
+
+def record_class(model: type, fields: Iterable[Tuple[str, Any]], pk: Optional[str], repo: Any) -> type:
+    """Genera la classe Record con slot di un modello (una per coppia ORM/modello)."""
+    fields = list(fields)
+    names = tuple(n for n, _ in fields)
+    ns: Dict[str, Any] = {
+        "__slots__": (),
+        "__module__": model.__module__,
+        "__qualname__": f"{model.__name__}Record",
+        "_fields": names,
+        "_index": {n: i for i, n in enumerate(names)},
+        "_pk": pk,
+        "_repo": repo,
+    }
+    for i, (n, f) in enumerate(fields):
+        # i metodi del Record (update/delete/to_dict) hanno la precedenza sui campi omonimi
+        if not hasattr(Record, n):
+            ns[n] = _relation_property(n, i) if f.kind == "fk" and not n.endswith("_id") else _field_property(n, i)
+    return type(f"{model.__name__}Record", (Record,), ns)
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Type
+
+from .records import _MISSING, Record
+
+# valori per query `IN` di prefetch_related, sotto i limiti di parametri di SQLite (32766) e MySQL (65535)
+PREFETCH_CHUNK = 10000
+
+# nome relazione -> (record collegati per chiave, indice della chiave nel Record, default)
+Loaded = Dict[str, Tuple[Dict[Any, Any], int, Any]]
+
+
+def relation_name(column: str) -> str:
+    """Nome della relazione di una ForeignKey: `author_id` -> `author`, `author` -> `author`."""
+    return column[:-3] if column.endswith("_id") else column
+
+
+def target_model(orm: Any, to: Any) -> Type:
+    if not isinstance(to, str):
+        return to
+    for model, mi in orm._models.items():
+        if model.__name__ == to or mi.table == to:
+            return model
+    raise ValueError(f"ForeignKey verso {to!r}: modello non registrato (chiama prima orm.repo({to}))")
+
+
+def forward(repo: Any, name: str) -> Tuple[str, Any]:
+    """(colonna FK, repository del modello collegato) della relazione `name`."""
+    for column, f in repo.mi.fields:
+        if f.kind == "fk" and relation_name(column) == name:
+            target = repo.orm.repo(target_model(repo.orm, f.to))
+            if target.mi.pk is None:
+                raise ValueError(f"{name}: il modello collegato non ha primary key")
+            return column, target
+    raise ValueError(f"{repo.mi.table} non ha una ForeignKey {name!r}")
+
+
+def reverse(repo: Any, name: str) -> Tuple[Any, str]:
+    """(repository figlio, colonna FK) della relazione inversa dichiarata con `related_name`."""
+    for model, mi in list(repo.orm._models.items()):
+        for column, f in mi.fields:
+            if f.kind == "fk" and f.related_name == name and target_model(repo.orm, f.to) is repo.model:
+                return repo.orm.repo(model), column
+    raise ValueError(f"{repo.mi.table}: nessuna ForeignKey con related_name={name!r}")
+
+
+def joins(repo: Any, names: Sequence[str]) -> List[Tuple[str, Any]]:
+    """(colonna FK, `_ModelInfo` collegato) per `lookups.select_sql`."""
+    return [(column, target.mi) for column, target in (forward(repo, n) for n in names)]
+
+
+def split_joined(repo: Any, rows: Sequence[Any], only: Sequence[str], names: Sequence[str]) -> Tuple[List[Record], Loaded]:
+    """Record e relazioni da righe di una SELECT con JOIN (select_related).
+
+    Ogni record collegato è costruito una sola volta per chiave, anche se
+    compare in molte righe.
+    """
+    vals = [tuple(r.values()) if isinstance(r, dict) else tuple(r) for r in rows]
+    columns = tuple(only) or repo.record._fields
+    start = len(columns)
+    records = repo.record.from_tuples(columns, [v[:start] for v in vals])
+    loaded: Loaded = {}
+    for name in names:
+        column, target = forward(repo, name)
+        width = len(target.mi.fields)
+        pk_at = target.record._index[target.mi.pk]
+        found: Dict[Any, Record] = {}
+        for v in vals:
+            key = v[start + pk_at]
+            if key is not None and key not in found:
+                found[key] = target.record(v[start : start + width])
+        loaded[name] = (found, repo.record._index[column], None)
+        start += width
+    return records, loaded
+
+
+async def load(repo: Any, rows: Sequence[Any], only: Sequence[str], related: Sequence[str], prefetch: Sequence[str]) -> List[Record]:
+    """Record di una find/iter con select_related (`related`) e prefetch_related (`prefetch`)."""
+    if related:
+        records, loaded = split_joined(repo, rows, only, related)
+    else:
+        records, loaded = repo.record.from_rows(rows), {}
+    if prefetch and records:
+        await prefetch_into(repo, records, prefetch, loaded)
+    if loaded:
+        attach(records, loaded)
+    return records
+
+
+async def prefetch_into(repo: Any, records: List[Record], names: Iterable[str], loaded: Loaded) -> None:
+    """Carica ogni relazione con una query `IN (...)` sulle chiavi dei record.
+
+    Relazioni dirette (ForeignKey del modello) e inverse (`related_name`,
+    es. `author.posts`, una tupla di record).
+    """
+    for name in names:
+        if any(f.kind == "fk" and relation_name(c) == name for c, f in repo.mi.fields):
+            column, target = forward(repo, name)
+            at = repo.record._index[column]
+            pk_at = target.record._index[target.mi.pk]
+            found: Dict[Any, Any] = {}
+            for rec in await _find_in(target, target.mi.pk, _keys(records, at)):
+                found[rec._values[pk_at]] = rec
+            loaded[name] = (found, at, None)
+        else:
+            child, column = reverse(repo, name)
+            at = repo.record._index[repo.mi.pk]
+            fk_at = child.record._index[column]
+            groups: Dict[Any, List[Record]] = {}
+            for rec in await _find_in(child, column, _keys(records, at)):
+                groups.setdefault(rec._values[fk_at], []).append(rec)
+            loaded[name] = ({k: tuple(v) for k, v in groups.items()}, at, ())
+
+
+def attach(records: Iterable[Record], loaded: Loaded) -> None:
+    # un solo dict condiviso: nessuna allocazione per record
+    for rec in records:
+        rec._rel = loaded
+
+
+def _keys(records: Iterable[Record], at: int) -> List[Any]:
+    return list({v for v in (r._values[at] for r in records) if v is not None and v is not _MISSING})
+
+
+async def _find_in(repo: Any, column: str, keys: List[Any]) -> List[Record]:
+    out: List[Record] = []
+    for i in range(0, len(keys), PREFETCH_CHUNK):
+        out.extend(await repo.find([(column + "__in", keys[i : i + PREFETCH_CHUNK])]))
+    return out
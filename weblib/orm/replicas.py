@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+
+BALANCE = ("round_robin", "least_connections")
+
+# una replica: DSN, oppure {"dsn": ..., "min_size": ..., "max_size": ...} per un pool di dimensione diversa
+ReplicaNode = Union[str, Dict[str, Any]]
+
+
+def replica_nodes(replicas: Sequence[ReplicaNode], min_size: int, max_size: int) -> List[Tuple[str, int, int]]:
+    """(dsn, min_size, max_size) di ogni replica; le dimensioni mancanti sono quelle del primary."""
+    out: List[Tuple[str, int, int]] = []
+    for node in replicas:
+        if isinstance(node, str):
+            out.append((node, min_size, max_size))
+        elif "dsn" in node:
+            out.append((node["dsn"], int(node.get("min_size", min_size)), int(node.get("max_size", max_size))))
+        else:
+            raise ValueError(f"Replica senza 'dsn': {node!r}")
+    return out
+
+
+class Replicas:
+    """Sceglie il pool per le letture: una replica, oppure il primary.
+
+    `round_robin` alterna le repliche a ogni lettura; `least_connections`
+    sceglie quella con meno letture in corso. Con `read_your_writes` (secondi)
+    le letture di una tabella scritta da poco vanno al primary, così una
+    richiesta che segue una scrittura (es. redirect dopo un POST) non vede
+    una replica in ritardo. La finestra vale per tutto il processo e parte
+    dalla fine della scrittura (dal commit dentro `orm.transaction()`).
+    """
+
+    def __init__(self, pools: Sequence[Any], balance: str = "round_robin", read_your_writes: float = 0.0) -> None:
+        if balance not in BALANCE:
+            raise ValueError(f"balance deve essere uno tra {', '.join(BALANCE)}: {balance!r}")
+        self.pools = list(pools)
+        self.balance = balance
+        self.read_your_writes = read_your_writes
+        self.primary_reads = 0
+        self._reads = [0] * len(self.pools)
+        self._busy = [0] * len(self.pools)
+        self._next = 0
+        self._written: Dict[str, float] = {}  # tabella -> time.monotonic() dell'ultima scrittura
+
+    def wrote(self, *tables: str) -> None:
+        if self.pools and self.read_your_writes > 0:
+            now = time.monotonic()
+            for table in tables:
+                self._written[table] = now
+
+    def _pick(self, table: Optional[str]) -> Optional[int]:
+        if not self.pools:
+            return None
+        if table is not None and self.read_your_writes > 0:
+            at = self._written.get(table)
+            if at is not None:
+                if time.monotonic() - at < self.read_your_writes:
+                    return None
+                del self._written[table]
+        if self.balance == "least_connections":
+            return min(range(len(self.pools)), key=self._busy.__getitem__)
+        i = self._next % len(self.pools)
+        self._next = i + 1
+        return i
+
+    @asynccontextmanager
+    async def reading(self, table: Optional[str], primary: Any) -> AsyncIterator[Any]:
+        """Pool su cui eseguire una lettura di `table` (`primary` se nessuna replica è adatta)."""
+        i = self._pick(table)
+        if i is None:
+            self.primary_reads += 1
+            yield primary
+            return
+        self._reads[i] += 1
+        self._busy[i] += 1
+        try:
+            yield self.pools[i]
+        finally:
+            self._busy[i] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "balance": self.balance,
+            "primary_reads": self.primary_reads,
+            "replicas": [
+                {"dsn": _redact(p.dsn), "reads": self._reads[i], "in_use": self._busy[i]} for i, p in enumerate(self.pools)
+            ],
+        }
+
+
+def _redact(dsn: str) -> str:
+    # niente password nelle statistiche (finiscono in log e pagine di debug)
+    head, sep, tail = dsn.rpartition("@")
+    if not sep or "://" not in head:
+        return dsn
+    scheme, _, userinfo = head.partition("://")
+    return f"{scheme}://{userinfo.split(':', 1)[0]}@{tail}"
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Protocol, Sequence, Set, Tuple
+
+from .records import Record
+
+# righe in cache: tuple di valori nell'ordine delle colonne selezionate
+Rows = Tuple[Tuple[Any, ...], ...]
+
+
+class CacheBackend(Protocol):
+    """Dove vivono i risultati. `get` restituisce None se la chiave manca o è scaduta.
+
+    Un backend condiviso tra processi (es. Redis) riceve solo stringhe e
+    tuple di valori semplici; `invalidate(table)` può essere realizzata
+    versionando le chiavi per tabella e incrementando la versione.
+    """
+
+    async def get(self, table: str, key: str) -> Optional[Rows]: ...
+    async def set(self, table: str, key: str, rows: Rows, ttl: float) -> None: ...
+    async def invalidate(self, table: str) -> None: ...
+    async def clear(self) -> None: ...
+
+
+class MemoryCache:
+    """Backend in processo: LRU con scadenza per voce e indice delle chiavi per tabella."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, str, Rows]]" = OrderedDict()  # chiave -> (scadenza, tabella, righe)
+        self._by_table: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, table: str, key: str) -> Optional[Rows]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    async def set(self, table: str, key: str, rows: Rows, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, table, rows)
+        self._entries.move_to_end(key)
+        self._by_table.setdefault(table, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+
+    async def invalidate(self, table: str) -> None:
+        for key in self._by_table.pop(table, ()):
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+        self._by_table.clear()
+
+    def _drop(self, key: str) -> None:
+        _, table, _ = self._entries.pop(key)
+        keys = self._by_table.get(table)
+        if keys is not None:
+            keys.discard(key)
+
+
+class ResultCache:
+    """Cache opzionale dei risultati di `Repository.get`/`find`: `SQLiteORM(..., result_cache=ResultCache(ttl=30))`.
+
+    La chiave è modello + operazione + filtri, ordinamento, limit/offset,
+    colonne e cursore. `create`, `update_one`, `delete_one` e i `bulk_*`
+    invalidano la tabella (dentro `orm.transaction()` al commit). Non passano
+    dalla cache le letture in una transazione e quelle con
+    select_related/prefetch_related. `Meta.cache_ttl` cambia la durata per
+    modello (0 la esclude).
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = 60.0, maxsize: int = 1024) -> None:
+        self.backend: CacheBackend = backend if backend is not None else MemoryCache(maxsize)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # incrementata a ogni scrittura: un risultato letto prima di un'invalidazione non entra in cache
+        self._generation: Dict[str, int] = {}
+
+    async def records(
+        self, repo: Any, key: Tuple[Any, ...], load: Callable[[], Awaitable[List[Record]]], only: Sequence[str] = ()
+    ) -> List[Record]:
+        ttl = getattr(getattr(repo.model, "Meta", object), "cache_ttl", None)
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or repo.orm._tx.get() is not None:
+            return await load()
+        table = repo.mi.table
+        columns = tuple(only) or repo.record._fields
+        k = repr((repo.model.__qualname__, table) + key)
+        rows = await self.backend.get(table, k)
+        if rows is not None:
+            self.hits += 1
+            return repo.record.from_tuples(columns, rows)
+        self.misses += 1
+        generation = self._generation.get(table, 0)
+        records = await load()
+        if self._generation.get(table, 0) == generation and not any(r._extra for r in records):
+            await self.backend.set(table, k, _pack(records, columns), ttl)
+        return records
+
+    async def invalidate(self, *tables: str) -> None:
+        for table in tables:
+            self._generation[table] = self._generation.get(table, 0) + 1
+            self.invalidations += 1
+            await self.backend.invalidate(table)
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, int]:
+        out = {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+        if hasattr(self.backend, "__len__"):
+            out["size"] = len(self.backend)  # type: ignore[arg-type]
+        return out
+
+
+def _pack(records: List[Record], columns: Tuple[str, ...]) -> Rows:
+    if not records:
+        return ()
+    cls = type(records[0])
+    if columns == cls._fields:
+        return tuple(r._values for r in records)
+    at = [cls._index[c] for c in columns]
+    return tuple(tuple(r._values[i] for i in at) for r in records)
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Letture identiche in corso condividono una sola query: `SQLiteORM(..., single_flight=True)`.
+
+    Chi chiede la stessa query (SQL e parametri) mentre è già in esecuzione
+    ne attende il risultato invece di occupare un'altra connessione: con
+    cento richieste concorrenti della home parte una query sola. Una
+    scrittura sulla tabella (`wrote`) separa le letture successive da quelle
+    già partite, così nessuno riceve righe lette prima della propria
+    scrittura. Le letture dentro `orm.transaction()` non passano di qui.
+    """
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.shared = 0
+        self._flights: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._generation: Dict[str, int] = {}
+
+    async def do(self, table: str, key: Tuple[Any, ...], load: Callable[[], Awaitable[T]]) -> T:
+        k: Hashable = (table, self._generation.get(table, 0), key)
+        try:
+            hash(k)
+        except TypeError:
+            # parametri non hashable (es. le liste di `__in` su Postgres)
+            k = (table, self._generation.get(table, 0), repr(key))
+        flight = self._flights.get(k)
+        if flight is None:
+            self.queries += 1
+            flight = asyncio.ensure_future(self._run(k, load))
+            self._flights[k] = flight
+            flight.add_done_callback(_retrieve)
+        else:
+            self.shared += 1
+        # la query continua anche se chi l'ha avviata viene cancellato: gli altri la stanno aspettando
+        return await asyncio.shield(flight)
+
+    async def _run(self, k: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await load()
+        finally:
+            # fuori prima che il risultato arrivi a chi aspetta: chi chiede dopo fa una query nuova
+            self._flights.pop(k, None)
+
+    def wrote(self, *tables: str) -> None:
+        for table in tables:
+            self._generation[table] = self._generation.get(table, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"queries": self.queries, "shared": self.shared, "in_flight": len(self._flights)}
+
+
+def _retrieve(flight: "asyncio.Future[Any]") -> None:
+    # se tutti hanno smesso di aspettare, l'eccezione non va segnalata come mai letta
+    if not flight.cancelled():
+        flight.exception()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+
+class SQLCache:
+    """LRU delle stringhe SQL già generate.
+
+    Le chiavi descrivono la forma dello statement, mai i valori: (modello,
+    operazione, insieme di colonne, ordinamento, presenza del limit). I
+    valori passano sempre come parametri, quindi una voce serve tutte le
+    chiamate con la stessa forma.
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        entries = self._entries
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            value = entries[key] = build()
+            if len(entries) > self.maxsize:
+                entries.popitem(last=False)
+            return value
+        self.hits += 1
+        entries.move_to_end(key)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
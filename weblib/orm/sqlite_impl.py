@@ -3,11 +3,20 @@ from __future__ import annotations
 import asyncio
 import os
 import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from dataclasses import dataclass
-from typing import Any, AsyncContextManager, Dict, Iterable, List, Optional, Tuple, Type
+from dataclasses import dataclass, field
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Type, TypeVar
 
-from .fields import Field
+from . import bulk, indexes, lookups, metrics, migrations, relations, transactions
+from .fields import Field, Index
+from .records import Record, record_class
+from .resultcache import ResultCache
+from .singleflight import SingleFlight
+from .sqlcache import SQLCache
+
+T = TypeVar("T")
 
 
 def _sql_type(f: Field) -> str:
@@ -29,6 +38,8 @@ class _ModelInfo:
     table: str
     fields: List[Tuple[str, Field]]  # (name, field)
     pk: Optional[str]
+    record: Optional[type] = None  # classe Record generata (vedi records.record_class)
+    indexes: List[Index] = field(default_factory=list)
 
 
 def _introspect_model(model: Type) -> _ModelInfo:
@@ -48,48 +59,172 @@ def _introspect_model(model: Type) -> _ModelInfo:
             if n == "id" and f.kind == "int":
                 pk_name = n
                 break
-    return _ModelInfo(table=table, fields=names_fields, pk=pk_name)
+    return _ModelInfo(table=table, fields=names_fields, pk=pk_name, indexes=indexes.resolve(model, table, names_fields))
 
 
-class _AioSQLite:
-    def __init__(self, path: str) -> None:
-        self.path = path
-        self._conn: Optional[sqlite3.Connection] = None
+# Applied to every pooled connection; override per key via SQLiteORM(pragmas=...)
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "busy_timeout": 5000,
+}
 
-    async def __aenter__(self):
-        def _open():
-            conn = sqlite3.connect(self.path, check_same_thread=False)
-            conn.row_factory = sqlite3.Row
-            return conn
 
-        self._conn = await asyncio.to_thread(_open)
-        return self
+class _AioSQLite:
+    """Session over one pooled connection; every call runs on the pool's executor."""
 
-    async def __aexit__(self, exc_type, exc, tb):
-        if self._conn is not None:
-            conn = self._conn
-            self._conn = None
-            await asyncio.to_thread(conn.close)
+    def __init__(self, conn: sqlite3.Connection, executor: ThreadPoolExecutor) -> None:
+        self._conn = conn
+        self._executor = executor
+
+    def _run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
 
     async def execute(self, sql: str, params: Iterable[Any] | None = None):
-        assert self._conn is not None
-        return await asyncio.to_thread(self._conn.execute, sql, tuple(params or ()))
+        return await self._run(self._conn.execute, sql, tuple(params or ()))
 
     async def executemany(self, sql: str, seq: Iterable[Iterable[Any]]):
-        assert self._conn is not None
-        return await asyncio.to_thread(self._conn.executemany, sql, list(seq))
+        return await self._run(self._conn.executemany, sql, list(seq))
 
     async def fetchone(self, sql: str, params: Iterable[Any] | None = None) -> Optional[sqlite3.Row]:
         cur = await self.execute(sql, params)
-        return await asyncio.to_thread(cur.fetchone)
+        return await self._run(cur.fetchone)
 
     async def fetchall(self, sql: str, params: Iterable[Any] | None = None) -> List[sqlite3.Row]:
         cur = await self.execute(sql, params)
-        return await asyncio.to_thread(cur.fetchall)
+        return await self._run(cur.fetchall)
+
+    async def fetchmany(self, cur: sqlite3.Cursor, size: int) -> List[sqlite3.Row]:
+        return await self._run(cur.fetchmany, size)
 
     async def commit(self):
-        assert self._conn is not None
-        await asyncio.to_thread(self._conn.commit)
+        await self._run(self._conn.commit)
+
+    async def rollback(self):
+        await self._run(self._conn.rollback)
+
+    async def unit(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `fn(conn)` plus commit/rollback in a single executor hop."""
+        return await self._run(_unit, self._conn, fn)
+
+    async def call(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Run `fn(conn)` without committing (inside `orm.transaction()`)."""
+        return await self._run(fn, self._conn)
+
+
+async def _control(db: _AioSQLite, sql: str) -> None:
+    await db.execute(sql)
+
+
+def _unit(conn: sqlite3.Connection, fn: Callable[[sqlite3.Connection], T]) -> T:
+    try:
+        result = fn(conn)
+        conn.commit()
+        return result
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+class _SQLitePool:
+    """Long-lived connections: one writer, up to `size` readers.
+
+    The writer lives on a dedicated single-thread executor and is guarded by
+    an asyncio.Lock, so writes are serialised without SQLITE_BUSY retries;
+    readers run on their own executor. A `:memory:` database exists only in
+    the writer connection, so there reads go through the writer too (same
+    isolation as a file, no reader parallelism). Readers older than
+    `max_lifetime` seconds are closed on release; the writer is never recycled.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = 4,
+        pragmas: Dict[str, Any] | None = None,
+        acquire_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+    ) -> None:
+        self.path = path
+        self.size = max(1, size)
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self.memory = path == ":memory:"
+        self.writer_executor = ThreadPoolExecutor(1, thread_name_prefix="weblib-sqlite-w")
+        self.reader_executor = ThreadPoolExecutor(self.size, thread_name_prefix="weblib-sqlite-r")
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock: Optional[asyncio.Lock] = None
+        self._idle: List[sqlite3.Connection] = []
+        self._readers: List[sqlite3.Connection] = []
+        self._available: Optional[asyncio.Semaphore] = None
+        self.writer_metrics = metrics.PoolStats(weak=False)
+        self.reader_metrics = metrics.PoolStats(weak=False)
+
+    def resize(self, size: int) -> None:
+        if self._available is not None:
+            raise RuntimeError("pool_size: il pool è già aperto, configura l'ORM prima dell'avvio")
+        self.size = max(1, size)
+        self.reader_executor.shutdown(wait=False)
+        self.reader_executor = ThreadPoolExecutor(self.size, thread_name_prefix="weblib-sqlite-r")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for key, value in self.pragmas.items():
+            conn.execute(f"pragma {key}={value}")
+        return conn
+
+    async def _run(self, executor: ThreadPoolExecutor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    async def writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = await self._run(self.writer_executor, self._connect)
+        return self._writer
+
+    @asynccontextmanager
+    async def connection(self, readonly: bool = False):
+        if self._writer_lock is None:
+            self._writer_lock = asyncio.Lock()
+            self._available = asyncio.Semaphore(self.size)
+        if not readonly or self.memory:
+            async with self.writer_metrics.acquiring(self._writer_lock, self.acquire_timeout):
+                conn = await self.writer()
+                self.writer_metrics.seen(conn)
+                yield _AioSQLite(conn, self.writer_executor)
+            return
+        await self.writer()  # creates the file (and applies the WAL pragma) first
+        assert self._available is not None
+        async with self.reader_metrics.acquiring(self._available, self.acquire_timeout):
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = await self._run(self.reader_executor, self._connect)
+                self._readers.append(conn)
+            self.reader_metrics.seen(conn)
+            try:
+                yield _AioSQLite(conn, self.reader_executor)
+            finally:
+                if self.reader_metrics.expired(conn, self.max_lifetime):
+                    self._readers.remove(conn)
+                    await self._run(self.reader_executor, conn.close)
+                else:
+                    self._idle.append(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"writer": self.writer_metrics.stats(), "readers": {"size": self.size, **self.reader_metrics.stats()}}
+
+    async def close(self) -> None:
+        for conn in self._readers:
+            self.reader_metrics.forget(conn)
+            await self._run(self.reader_executor, conn.close)
+        self._readers.clear()
+        self._idle.clear()
+        if self._writer is not None:
+            self.writer_metrics.forget(self._writer)
+            await self._run(self.writer_executor, self._writer.close)
+            self._writer = None
 
 
 class SQLiteORM:
@@ -98,40 +233,225 @@ class SQLiteORM:
     - Nessuna dipendenza esterna
     - Mapping semplice campi→colonne
     - Repository e Query basilari
+    - Pool di connessioni persistenti (1 writer + N reader) con PRAGMA WAL
     """
 
-    def __init__(self, path: str = ":memory:") -> None:
+    def __init__(
+        self,
+        path: str = ":memory:",
+        pool_size: int = 4,
+        pragmas: Dict[str, Any] | None = None,
+        sql_cache_size: int = 512,
+        auto_create: bool = True,
+        check_indexes: bool = False,
+        acquire_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        slow_query_ms: Optional[float] = None,
+        result_cache: Optional[ResultCache] = None,
+        single_flight: bool = False,
+    ) -> None:
         self.path = path
+        self._pool = _SQLitePool(path, size=pool_size, pragmas=pragmas, acquire_timeout=acquire_timeout, max_lifetime=max_lifetime)
         self._models: Dict[Type, _ModelInfo] = {}
         self._ensured: set[str] = set()
+        self._schema_lock = asyncio.Lock()
+        # False (produzione): nessun controllo per chiamata, le tabelle vanno create con bootstrap()/migrate()
+        self.auto_create = auto_create
+        # True (sviluppo): logga i filtri `where` che nessun indice copre
+        self.check_indexes = check_indexes
+        self.sql_cache = SQLCache(sql_cache_size)
+        self.dialect = _DIALECT
+        self._tx = transactions.context_var(self)
+        self.queries = metrics.QueryStats(slow_query_ms)
+        # opt-in: risultati di get/find in cache, invalidati dalle scritture sulla stessa tabella
+        self.result_cache = result_cache
+        # opt-in: letture identiche in corso condividono una sola query
+        self.single_flight = SingleFlight() if single_flight else None
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        out = {"sql": self.sql_cache.stats()}
+        if self.result_cache is not None:
+            out["results"] = self.result_cache.stats()
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool (attesa per writer e reader, connessioni in uso/in coda, età), latenza per forma di query e letture condivise."""
+        out: Dict[str, Any] = {"pools": self._pool.stats(), "queries": self.queries.stats()}
+        if self.single_flight is not None:
+            out["single_flight"] = self.single_flight.stats()
+        return out
+
+    def configure(
+        self,
+        pool_size: Optional[int] = None,
+        acquire_timeout: Optional[float] = None,
+        max_lifetime: Optional[float] = None,
+        slow_query_ms: Optional[float] = None,
+    ) -> None:
+        """Regola pool e log delle query lente (vedi `WebAppConfig.db_*`); None lascia il valore attuale."""
+        if pool_size is not None and pool_size != self._pool.size:
+            self._pool.resize(pool_size)
+        if acquire_timeout is not None:
+            self._pool.acquire_timeout = acquire_timeout
+        if max_lifetime is not None:
+            self._pool.max_lifetime = max_lifetime
+        if slow_query_ms is not None:
+            self.queries.slow_query_ms = slow_query_ms
 
     async def create_database(self):
-        # Per SQLite il DB è creato on-demand all'apertura
-        if self.path != ":memory:" and not os.path.exists(self.path):
-            # apri/chiudi per creare il file
-            async with _AioSQLite(self.path):
-                pass
+        # Per SQLite il DB è creato on-demand all'apertura della connessione writer
+        await self._pool.writer()
 
     async def drop_database(self):
-        if self.path != ":memory:" and os.path.exists(self.path):
-            os.remove(self.path)
+        await self.close()
+        if self.path != ":memory:":
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+        self._ensured.clear()
+
+    async def close(self):
+        await self._pool.close()
 
     @asynccontextmanager
-    async def session(self) -> AsyncContextManager[_AioSQLite]:
-        async with _AioSQLite(self.path) as db:
+    async def session(self, readonly: bool = False) -> AsyncContextManager[_AioSQLite]:
+        tx = self._tx.get()
+        if tx is not None:
+            # dentro orm.transaction(): commit/rollback li decide la transazione
+            yield tx.conn
+            return
+        async with self._pool.connection(readonly) as db:
             try:
                 yield db
                 await db.commit()
-            except Exception:
-                # SQLite non ha rollback automatico qui; semplifichiamo
+            except BaseException:
+                # le connessioni sono riusate: mai restituirle con una transazione aperta
+                await db.rollback()
                 raise
 
+    async def run_sync(
+        self, fn: Callable[[sqlite3.Connection], T], readonly: bool = False, sql: Optional[str] = None, table: Optional[str] = None
+    ) -> T:
+        """Esegue un'intera unità di lavoro sincrona `fn(conn)` con un solo await.
+
+        Query, fetch e commit (o rollback) girano sullo stesso thread del pool,
+        senza tornare all'event loop tra un'operazione e l'altra. Dentro
+        `orm.transaction()` usa la connessione della transazione e non fa commit.
+        Con `sql` il tempo dell'unità (attesa della connessione esclusa) va
+        nelle statistiche di quella forma di query; `table` è la tabella
+        scritta, da invalidare nella cache dei risultati dopo il commit.
+        """
+        tx = self._tx.get()
+        if tx is not None:
+            if table is not None:
+                tx.tables.add(table)
+            return await self._timed(sql, tx.conn.call(fn))
+        async with self._pool.connection(readonly) as db:
+            result = await self._timed(sql, db.unit(fn))
+        if table is not None:
+            await self._written(table)
+        return result
+
+    async def _written(self, *tables: str) -> None:
+        if self.single_flight is not None:
+            self.single_flight.wrote(*tables)
+        if self.result_cache is not None:
+            await self.result_cache.invalidate(*tables)
+
+    def _coalesced(self, table: str, key: Tuple[Any, ...], load: Callable[[], Awaitable[T]]) -> Awaitable[T]:
+        # dentro una transazione la lettura deve vedere le scritture non confermate del task: niente condivisione
+        if self.single_flight is None or self._tx.get() is not None:
+            return load()
+        return self.single_flight.do(table, key, load)
+
+    async def _timed(self, sql: Optional[str], work: Awaitable[T]) -> T:
+        if sql is None:
+            return await work
+        t0 = time.perf_counter()
+        try:
+            return await work
+        finally:
+            self.queries.observe(sql, time.perf_counter() - t0)
+
+    def transaction(self) -> AsyncContextManager[transactions.Transaction]:
+        """`async with orm.transaction():` raggruppa le chiamate del Repository in un solo commit.
+
+        Tutte le operazioni del task corrente usano la connessione writer
+        (le letture vedono le scritture non ancora confermate); un blocco
+        annidato è un savepoint, un'eccezione fa rollback del suo livello.
+        Le altre scritture attendono la fine della transazione.
+        """
+        return transactions.savepoints(
+            self._tx, lambda: self._pool.connection(False), _control, "begin immediate", committed=lambda tx: self._written(*tx.tables)
+        )
+
     async def migrate(self):
         # Crea tabelle per i modelli registrati (repo() chiamato almeno una volta)
-        async with self.session() as db:
+        def unit(conn: sqlite3.Connection) -> None:
             for mi in self._models.values():
-                sql = _create_table_sql(mi)
-                await db.execute(sql)
+                for sql in _schema_sql(mi):
+                    conn.execute(sql)
+                self._ensured.add(mi.table)
+
+        await self.run_sync(unit)
+
+    async def bootstrap(self, models: Iterable[Type] = ()) -> None:
+        """Crea/verifica una sola volta le tabelle di tutti i modelli registrati.
+
+        Pensato per lo startup dell'app (`WebApp.on_startup`); chiamate
+        concorrenti attendono la prima invece di ripetere il DDL.
+        """
+        for model in models:
+            self.repo(model)
+        async with self._schema_lock:
+            pending = [mi for mi in self._models.values() if mi.table not in self._ensured]
+            if not pending:
+                return
+
+            def unit(conn: sqlite3.Connection) -> None:
+                for mi in pending:
+                    for sql in _schema_sql(mi):
+                        conn.execute(sql)
+                    self._ensured.add(mi.table)
+
+            await self.run_sync(unit)
+
+    async def introspect(self) -> Dict[str, migrations.LiveTable]:
+        """Schema live: tabelle, colonne (tipo dichiarato) e indici."""
+
+        def unit(conn: sqlite3.Connection) -> Dict[str, migrations.LiveTable]:
+            out: Dict[str, migrations.LiveTable] = {}
+            tables = conn.execute("select name from sqlite_master where type='table' and name not like 'sqlite_%'").fetchall()
+            for (name,) in tables:
+                cols = {r[1]: (r[2] or "").upper() for r in conn.execute(f"pragma table_info({name})")}
+                indexes = {r[1] for r in conn.execute(f"pragma index_list({name})")}
+                out[name] = migrations.LiveTable(cols, indexes)
+            return out
+
+        return await self.run_sync(unit, readonly=True)
+
+    async def _applied_migrations(self) -> set[str]:
+        def unit(conn: sqlite3.Connection) -> set[str]:
+            conn.execute(f"create table if not exists {migrations.MIGRATIONS_TABLE} (version TEXT PRIMARY KEY, applied_at TEXT)")
+            return {r[0] for r in conn.execute(f"select version from {migrations.MIGRATIONS_TABLE}")}
+
+        return await self.run_sync(unit)
+
+    async def _apply_migration(self, version: str, statements: List[str]) -> None:
+        # In SQLite anche il DDL è transazionale: la migrazione si applica per intero o per niente
+        def unit(conn: sqlite3.Connection) -> None:
+            conn.execute("begin")
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(
+                f"insert into {migrations.MIGRATIONS_TABLE} (version, applied_at) values (?, datetime('now'))", (version,)
+            )
+
+        await self.run_sync(unit)
+        self._ensured.clear()
+        self.sql_cache.clear()
+        if self.result_cache is not None:
+            await self.result_cache.clear()
 
     def repo(self, model: Type) -> "Repository":
         mi = self._models.get(model)
@@ -145,9 +465,23 @@ class SQLiteORM:
     async def _ensure_table(self, mi: _ModelInfo):
         if mi.table in self._ensured:
             return
-        async with self.session() as db:
-            await db.execute(_create_table_sql(mi))
-        self._ensured.add(mi.table)
+        if self._tx.get() is not None:
+            # la transazione tiene già il writer: chi ha _schema_lock potrebbe essere in attesa proprio di lei
+            await self.run_sync(lambda conn: self._ensure_table_sync(conn, mi))
+            return
+        async with self._schema_lock:
+            if mi.table not in self._ensured:
+                await self.run_sync(lambda conn: self._ensure_table_sync(conn, mi))
+
+    def _ensure_table_sync(self, conn: sqlite3.Connection, mi: _ModelInfo) -> None:
+        # Da chiamare solo sulla connessione writer, dentro run_sync
+        if not self.auto_create or mi.table in self._ensured:
+            return
+        for sql in _schema_sql(mi):
+            conn.execute(sql)
+        # dentro orm.transaction() un rollback annulla anche il DDL: si segna alla prima verifica fuori
+        if not conn.in_transaction:
+            self._ensured.add(mi.table)
 
 
 def _create_table_sql(mi: _ModelInfo) -> str:
@@ -164,26 +498,41 @@ def _create_table_sql(mi: _ModelInfo) -> str:
     return f"create table if not exists {mi.table} (" + ", ".join(cols) + ")"
 
 
-@dataclass
-class Record:
-    _repo: "Repository"
-    _data: Dict[str, Any]
+def _schema_sql(mi: _ModelInfo) -> List[str]:
+    # Tabella + indici dichiarati (index=True / Meta.indexes)
+    return [_create_table_sql(mi)] + [_DIALECT.index(mi, ix) for ix in mi.indexes]
 
-    def __getattr__(self, item: str) -> Any:
-        if item in self._data:
-            return self._data[item]
-        raise AttributeError(item)
 
-    def to_dict(self) -> Dict[str, Any]:
-        return dict(self._data)
+class _SQLiteDialect:
+    name = "sqlite"
 
-    async def update(self, **fields) -> "Record":
-        await self._repo.update_one(self._data, fields)
-        self._data.update(fields)
-        return self
+    def create_table(self, mi: _ModelInfo) -> List[str]:
+        return _schema_sql(mi)
 
-    async def delete(self) -> None:
-        await self._repo.delete_one(self._data)
+    def column_type(self, f: Field) -> str:
+        return _sql_type(f)
+
+    def add_column(self, table: str, name: str, f: Field) -> List[str]:
+        if f.pk:
+            return [f"-- {table}.{name}: SQLite non aggiunge primary key a tabelle esistenti (serve ricostruire la tabella)"]
+        out = [f"alter table {table} add column {name} {_sql_type(f)}"]
+        if f.unique:
+            # ADD COLUMN non accetta UNIQUE: si usa un indice univoco
+            out.append(self.create_index(table, f"ux_{table}_{name}", [name], unique=True))
+        return out
+
+    def alter_column(self, table: str, name: str, f: Field, live_type: str) -> List[str]:
+        return [f"-- {table}.{name}: tipo {live_type} -> {_sql_type(f)} non modificabile con ALTER in SQLite (serve ricostruire la tabella)"]
+
+    def create_index(self, table: str, name: str, columns: List[str], unique: bool = False, where: Optional[str] = None) -> str:
+        sql = f"create {'unique ' if unique else ''}index if not exists {name} on {table} (" + ", ".join(columns) + ")"
+        return sql + (f" where {where}" if where else "")
+
+    def index(self, mi: _ModelInfo, ix: Index) -> str:
+        return self.create_index(mi.table, ix.name, list(ix.columns), ix.unique, ix.where)
+
+
+_DIALECT = _SQLiteDialect()
 
 
 class Query:
@@ -192,10 +541,15 @@ class Query:
         self._where: List[Tuple[str, Any]] = []
         self._order: Optional[str] = None
         self._limit: Optional[int] = None
-
-    def where(self, **eq) -> "Query":
-        for k, v in eq.items():
-            self._where.append((k, v))
+        self._offset: Optional[int] = None
+        self._only: Tuple[str, ...] = ()
+        self._after: List[Tuple[str, Any]] = []
+        self._related: Tuple[str, ...] = ()
+        self._prefetch: Tuple[str, ...] = ()
+
+    def where(self, **filters) -> "Query":
+        """Filtri in AND: `campo=v` o `campo__op=v` (gt, gte, lt, lte, ne, in, startswith, endswith, contains, isnull)."""
+        self._where.extend(filters.items())
         return self
 
     def order(self, expr: str) -> "Query":
@@ -206,92 +560,352 @@ class Query:
         self._limit = n
         return self
 
+    def offset(self, n: int) -> "Query":
+        self._offset = n
+        return self
+
+    def only(self, *columns: str) -> "Query":
+        """Seleziona solo queste colonne; gli altri campi del Record restano non valorizzati."""
+        self._only = columns
+        return self
+
+    def after(self, record: Optional[Record] = None, **cursor) -> "Query":
+        """Keyset pagination: righe successive al cursore secondo `order`.
+
+        Il cursore è `after(created=..., id=...)` oppure l'ultimo Record della
+        pagina precedente (se ne leggono le colonne di `order`, o la pk). Senza
+        `order` si ordina per le colonne del cursore.
+        """
+        if record is not None:
+            columns = [c for c, _ in lookups.order_terms(self._order)] or [self.repo.mi.pk]
+            cursor = {c: getattr(record, c) for c in columns}
+        if not cursor:
+            raise ValueError("after() richiede un Record o almeno una colonna")
+        if self._order is None:
+            self._order = ", ".join(cursor)
+        self._after = list(cursor.items())
+        return self
+
+    def select_related(self, *names: str) -> "Query":
+        """Carica le ForeignKey `names` nella stessa query con un LEFT JOIN (`post.author` diventa il Record)."""
+        self._related = names
+        return self
+
+    def prefetch_related(self, *names: str) -> "Query":
+        """Carica le relazioni `names` con una query `IN (...)` ciascuna dopo quella principale.
+
+        Vale per le ForeignKey del modello e per le relazioni inverse
+        dichiarate con `ForeignKey(..., related_name="posts")`.
+        """
+        self._prefetch = names
+        return self
+
+    def _options(self) -> Dict[str, Any]:
+        return {
+            "only": self._only,
+            "offset": self._offset,
+            "after": self._after,
+            "related": self._related,
+            "prefetch": self._prefetch,
+        }
+
     async def all(self) -> List[Record]:
-        return await self.repo.find(self._where, self._order, self._limit)
+        return await self.repo.find(self._where, self._order, self._limit, **self._options())
 
     async def first(self) -> Optional[Record]:
         rows = await self.limit(1).all()
         return rows[0] if rows else None
 
+    async def count(self) -> int:
+        """`select count(*)` con gli stessi filtri, senza leggere le righe."""
+        return await self.repo.count(self._where)
+
+    async def exists(self) -> bool:
+        return await self.repo.exists(self._where)
+
+    def iter(self, batch_size: int = 1000) -> AsyncIterator[Record]:
+        """Itera i risultati a blocchi di `batch_size` righe, senza materializzarli tutti."""
+        return self.repo.iter(self._where, self._order, self._limit, batch_size, **self._options())
+
+    def uncovered(self) -> List[str]:
+        """Colonne del `where` che nessun indice dichiarato copre (controllo statico)."""
+        return indexes.uncovered(self.repo.mi, [k for k, _ in self._where])
+
+    async def explain(self) -> List[str]:
+        """Piano di esecuzione reale (`explain query plan`), una riga per passo."""
+        return await self.repo.explain(self._where, self._order, self._limit, **self._options())
+
 
 class Repository:
     def __init__(self, orm: SQLiteORM, model: Type, mi: _ModelInfo) -> None:
         self.orm = orm
         self.model = model
         self.mi = mi
+        if mi.record is None:
+            mi.record = record_class(model, mi.fields, mi.pk, self)
+        self.record = mi.record
+
+    def _sql(self, key: Tuple[Any, ...], build) -> Any:
+        return self.orm.sql_cache.get((self.model,) + key, build)
 
     async def create(self, **fields) -> Record:
-        cols = []
-        vals = []
-        ph = []
-        for name, f in self.mi.fields:
-            if name in fields and not f.pk:
-                cols.append(name)
-                vals.append(fields[name])
-                ph.append("?")
-        sql = f"insert into {self.mi.table} (" + ",".join(cols) + ") values (" + ",".join(ph) + ")"
-        await self.orm._ensure_table(self.mi)
-        async with self.orm.session() as db:
-            cur = await db.execute(sql, vals)
-            last_id = cur.lastrowid
+        def build() -> Tuple[str, List[str]]:
+            cols = [name for name, f in self.mi.fields if name in fields and not f.pk]
+            return f"insert into {self.mi.table} (" + ",".join(cols) + ") values (" + ",".join("?" * len(cols)) + ")", cols
+
+        sql, cols = self._sql(("insert", tuple(fields)), build)
+        vals = [fields[c] for c in cols]
+
+        def unit(conn: sqlite3.Connection) -> Optional[int]:
+            self.orm._ensure_table_sync(conn, self.mi)
+            return conn.execute(sql, vals).lastrowid
+
+        last_id = await self.orm.run_sync(unit, sql=sql, table=self.mi.table)
         data = dict(fields)
         if self.mi.pk and self.mi.pk not in data:
             data[self.mi.pk] = last_id
-        return Record(self, data)
+        return self.record.from_dict(data)
+
+    def _filtered(self, op: str, where: Iterable[Tuple[str, Any]] | None, head: str, tail: str = "") -> Tuple[str, List[Any]]:
+        # SQL "<head> from tabella where ...<tail>" in cache per forma dei filtri
+        where = list(where or [])
+
+        def build() -> str:
+            if self.orm.check_indexes:
+                indexes.warn_uncovered(self.mi, [k for k, _ in where])
+            return f"{head} from {self.mi.table}{lookups.where_clause(self.mi, where, _ph)}{tail}"
+
+        return self._sql((op, lookups.shape(where)), build), lookups.params(where)
 
     async def get(self, **filters) -> Optional[Record]:
-        where_sql, params = _where(filters)
-        sql = f"select * from {self.mi.table} {where_sql} limit 1"
-        await self.orm._ensure_table(self.mi)
-        async with self.orm.session() as db:
-            row = await db.fetchone(sql, params)
+        sql, params = self._filtered("get", filters.items(), "select *", " limit 1")
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        if self.orm.result_cache is not None:
+            found = await self.orm.result_cache.records(self, ("get", tuple(filters.items())), lambda: self._fetch(sql, params))
+            return found[0] if found else None
+        row = await self._read("fetchone", sql, params)
         if row is None:
             return None
-        return Record(self, dict(row))
+        return self.record.from_row(row)
 
     def query(self) -> Query:
         return Query(self)
 
-    async def find(self, where: List[Tuple[str, Any]] | None = None, order: Optional[str] = None, limit: Optional[int] = None) -> List[Record]:
-        filters = {k: v for (k, v) in (where or [])}
-        where_sql, params = _where(filters)
-        order_sql = f" order by {order}" if order else ""
-        limit_sql = f" limit {int(limit)}" if limit is not None else ""
-        sql = f"select * from {self.mi.table}{where_sql}{order_sql}{limit_sql}"
-        await self.orm._ensure_table(self.mi)
-        async with self.orm.session() as db:
-            rows = await db.fetchall(sql, params)
-        return [Record(self, dict(r)) for r in rows]
+    def _select(
+        self,
+        where: List[Tuple[str, Any]] | None,
+        order: Optional[str],
+        limit: Optional[int],
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+    ) -> Tuple[str, List[Any]]:
+        where = list(where or [])
+        cursor = [c for c, _ in after]
+        related = tuple(related)
+
+        def build() -> str:
+            if self.orm.check_indexes:
+                indexes.warn_uncovered(self.mi, [k for k, _ in where])
+            return lookups.select_sql(self.mi, where, _ph, order, limit is not None, only, offset is not None, cursor, unlimited="-1", joins=relations.joins(self, related))
+
+        key = ("select", lookups.shape(where), order, limit is not None, tuple(only), offset is not None, tuple(cursor), related)
+        sql = self._sql(key, build)
+        return sql, lookups.select_params(where, limit, offset, [v for _, v in after])
+
+    async def find(
+        self,
+        where: List[Tuple[str, Any]] | None = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+        prefetch: Sequence[str] = (),
+    ) -> List[Record]:
+        sql, params = self._select(where, order, limit, only, offset, after, related)
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        if self.orm.result_cache is not None and not related and not prefetch:
+            key = ("find", tuple(where or ()), order, limit, offset, tuple(only), tuple(after))
+            return await self.orm.result_cache.records(self, key, lambda: self._fetch(sql, params, only), only)
+        return await self._fetch(sql, params, only, related, prefetch)
+
+    async def _fetch(
+        self, sql: str, params: List[Any], only: Sequence[str] = (), related: Sequence[str] = (), prefetch: Sequence[str] = ()
+    ) -> List[Record]:
+        rows = await self._read("fetchall", sql, params)
+        if related or prefetch:
+            return await relations.load(self, rows, only, related, prefetch)
+        return self.record.from_rows(rows)
+
+    def _read(self, method: str, sql: str, params: List[Any]) -> Awaitable[Any]:
+        # righe grezze (fetchone/fetchall): con single_flight le condividono le chiamate identiche in corso
+        return self.orm._coalesced(
+            self.mi.table,
+            (method, sql, *params),
+            lambda: self.orm.run_sync(lambda conn: getattr(conn.execute(sql, params), method)(), readonly=True, sql=sql),
+        )
+
+    async def count(self, where: List[Tuple[str, Any]] | None = None) -> int:
+        sql, params = self._filtered("count", where, "select count(*)")
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        return (await self._read("fetchone", sql, params))[0]
+
+    async def exists(self, where: List[Tuple[str, Any]] | None = None) -> bool:
+        sql, params = self._filtered("exists", where, "select 1", " limit 1")
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        return await self._read("fetchone", sql, params) is not None
+
+    async def explain(
+        self,
+        where: List[Tuple[str, Any]] | None = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+        prefetch: Sequence[str] = (),
+    ) -> List[str]:
+        sql, params = self._select(where, order, limit, only, offset, after, related)
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        rows = await self.orm.run_sync(lambda conn: conn.execute("explain query plan " + sql, params).fetchall(), readonly=True)
+        return [r[-1] for r in rows]
+
+    async def iter(
+        self,
+        where: List[Tuple[str, Any]] | None = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        batch_size: int = 1000,
+        only: Sequence[str] = (),
+        offset: Optional[int] = None,
+        after: Sequence[Tuple[str, Any]] = (),
+        related: Sequence[str] = (),
+        prefetch: Sequence[str] = (),
+    ) -> AsyncIterator[Record]:
+        sql, params = self._select(where, order, limit, only, offset, after, related)
+        if self.orm.auto_create:
+            await self.orm._ensure_table(self.mi)
+        if self.orm._pool.memory and self.orm._tx.get() is None:
+            # `:memory:` ha solo il writer: un cursore aperto bloccherebbe ogni altra query (anche il prefetch)
+            rows = await self.orm.run_sync(lambda conn: conn.execute(sql, params).fetchall(), readonly=True, sql=sql)
+            for i in range(0, len(rows), batch_size):
+                for rec in await self._batch(rows[i : i + batch_size], only, related, prefetch):
+                    yield rec
+            return
+        # la connessione reader resta occupata finché l'iterazione non termina
+        async with self.orm.session(readonly=True) as db:
+            cur = await db.execute(sql, params)
+            try:
+                while True:
+                    rows = await db.fetchmany(cur, batch_size)
+                    if not rows:
+                        break
+                    for rec in await self._batch(rows, only, related, prefetch):
+                        yield rec
+            finally:
+                cur.close()
+
+    async def _batch(self, rows: List[Any], only: Sequence[str], related: Sequence[str], prefetch: Sequence[str]) -> List[Record]:
+        if related or prefetch:
+            return await relations.load(self, rows, only, related, prefetch)
+        return self.record.from_rows(rows)
 
     async def update_one(self, data: Dict[str, Any], changes: Dict[str, Any]) -> None:
         if not self.mi.pk or self.mi.pk not in data:
             raise ValueError("Update requires primary key on record")
-        sets = ",".join(f"{k}=?" for k in changes.keys())
-        sql = f"update {self.mi.table} set {sets} where {self.mi.pk}=?"
+        sql = self._sql(
+            ("update", tuple(changes)),
+            lambda: f"update {self.mi.table} set " + ",".join(f"{k}=?" for k in changes) + f" where {self.mi.pk}=?",
+        )
         params = list(changes.values()) + [data[self.mi.pk]]
-        await self.orm._ensure_table(self.mi)
-        async with self.orm.session() as db:
-            await db.execute(sql, params)
+        await self.orm.run_sync(lambda conn: self._write(conn, sql, params), sql=sql, table=self.mi.table)
 
     async def delete_one(self, data: Dict[str, Any]) -> None:
         if not self.mi.pk or self.mi.pk not in data:
             raise ValueError("Delete requires primary key on record")
-        sql = f"delete from {self.mi.table} where {self.mi.pk}=?"
+        sql = self._sql(("delete",), lambda: f"delete from {self.mi.table} where {self.mi.pk}=?")
         params = [data[self.mi.pk]]
-        await self.orm._ensure_table(self.mi)
-        async with self.orm.session() as db:
-            await db.execute(sql, params)
-
-
-def _where(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
-    if not filters:
-        return "", []
-    parts = []
-    params: List[Any] = []
-    for k, v in filters.items():
-        parts.append(f"{k}=?")
-        params.append(v)
-    return " where " + " and ".join(parts), params
+        await self.orm.run_sync(lambda conn: self._write(conn, sql, params), sql=sql, table=self.mi.table)
+
+    def _write(self, conn: sqlite3.Connection, sql: str, params: List[Any]) -> None:
+        self.orm._ensure_table_sync(conn, self.mi)
+        conn.execute(sql, params)
+
+    async def bulk_create(self, rows: bulk.Rows, batch_size: int = bulk.BATCH_SIZE, returning: bool = True) -> List[Any]:
+        """Inserisce righe (dict, anche da un async iterable) a blocchi con `executemany`.
+
+        Ogni blocco è una transazione sulla connessione writer. Restituisce le
+        primary key generate, nell'ordine delle righe (lista vuota se
+        `returning=False` o se le pk sono fornite dal chiamante).
+        """
+        pks: List[Any] = []
+        sql: Optional[str] = None
+        cols: List[str] = []
+        for_pk = False
+        async for batch in bulk.batches(rows, batch_size):
+            if sql is None:
+                cols = bulk.columns(self.mi, batch[0])
+                for_pk = returning and bulk.auto_pk(self.mi, cols)
+                sql = f"insert into {self.mi.table} (" + ",".join(cols) + ") values (" + ",".join("?" * len(cols)) + ")"
+            params = bulk.values(self.mi, batch, cols)
+
+            def unit(conn: sqlite3.Connection, sql: str = sql, params: List[Tuple[Any, ...]] = params) -> Optional[int]:
+                self.orm._ensure_table_sync(conn, self.mi)
+                conn.executemany(sql, params)
+                # il writer è unico e serializzato: gli id AUTOINCREMENT del blocco sono contigui
+                return conn.execute("select last_insert_rowid()").fetchone()[0] if for_pk else None
+
+            last = await self.orm.run_sync(unit, table=self.mi.table)
+            if for_pk:
+                pks.extend(range(last - len(params) + 1, last + 1))
+        return pks
+
+    async def bulk_upsert(
+        self,
+        rows: bulk.Rows,
+        conflict: Optional[List[str]] = None,
+        update: Optional[List[str]] = None,
+        batch_size: int = bulk.BATCH_SIZE,
+    ) -> int:
+        """Insert-or-update a blocchi (`on conflict (...) do update`).
+
+        `conflict` sono le colonne univoche (default: pk); `update` le colonne da
+        sovrascrivere (default: tutte le altre). Restituisce le righe inviate.
+        """
+        total = 0
+        sql: Optional[str] = None
+        cols: List[str] = []
+        async for batch in bulk.batches(rows, batch_size):
+            if sql is None:
+                cols = bulk.columns(self.mi, batch[0])
+                target, changed = bulk.upsert_columns(self.mi, cols, conflict, update)
+                action = "do update set " + ",".join(f"{c}=excluded.{c}" for c in changed) if changed else "do nothing"
+                sql = (
+                    f"insert into {self.mi.table} (" + ",".join(cols) + ") values (" + ",".join("?" * len(cols)) + ")"
+                    f" on conflict (" + ",".join(target) + f") {action}"
+                )
+            params = bulk.values(self.mi, batch, cols)
+            await self.orm.run_sync(lambda conn, sql=sql, params=params: self._write_many(conn, sql, params), table=self.mi.table)
+            total += len(params)
+        return total
+
+    def _write_many(self, conn: sqlite3.Connection, sql: str, params: List[Tuple[Any, ...]]) -> None:
+        self.orm._ensure_table_sync(conn, self.mi)
+        conn.executemany(sql, params)
+
+
+def _ph(i: int) -> str:
+    # segnaposto dell'i-esimo parametro (vedi lookups.Placeholder)
+    return "?"
 
 
 def _bind_model_helpers(orm: SQLiteORM, model: Type) -> None:
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Optional, Set
+
+
+class Transaction:
+    """Transazione in corso: la connessione che le chiamate del Repository riusano.
+
+    È legata al task corrente tramite una ContextVar: query concorrenti
+    (`asyncio.gather`) dentro la stessa transazione condividerebbero la
+    connessione e vanno evitate.
+    """
+
+    __slots__ = ("conn", "depth", "tables")
+
+    def __init__(self, conn: Any) -> None:
+        self.conn = conn
+        self.depth = 0  # savepoint annidati aperti
+        self.tables: Set[str] = set()  # tabelle scritte, segnalate a repliche e cache al commit
+
+
+def context_var(orm: Any) -> ContextVar[Optional[Transaction]]:
+    # una variabile per istanza: due ORM non condividono mai la transazione
+    return ContextVar(f"weblib_tx_{type(orm).__name__}_{id(orm):x}", default=None)
+
+
+@asynccontextmanager
+async def savepoints(
+    var: ContextVar[Optional[Transaction]],
+    acquire: Callable[[], AsyncContextManager[Any]],
+    execute: Callable[[Any, str], Awaitable[Any]],
+    begin: str = "begin",
+    committed: Optional[Callable[[Transaction], Awaitable[None]]] = None,
+) -> AsyncIterator[Transaction]:
+    """Transazione su una connessione di `acquire()`; se annidata diventa un savepoint.
+
+    `execute(conn, sql)` esegue i comandi di controllo (begin, commit,
+    savepoint...). Un'eccezione annulla solo il livello in cui avviene.
+    `await committed(tx)` segue il commit del livello più esterno.
+    """
+    tx = var.get()
+    if tx is not None:
+        tx.depth += 1
+        name = f"wl_sp{tx.depth}"
+        await execute(tx.conn, f"savepoint {name}")
+        try:
+            yield tx
+        except BaseException:
+            await execute(tx.conn, f"rollback to savepoint {name}")
+            await execute(tx.conn, f"release savepoint {name}")
+            raise
+        else:
+            await execute(tx.conn, f"release savepoint {name}")
+        finally:
+            tx.depth -= 1
+        return
+    async with acquire() as conn:
+        await execute(conn, begin)
+        tx = Transaction(conn)
+        token = var.set(tx)
+        try:
+            yield tx
+        except BaseException:
+            await execute(conn, "rollback")
+            raise
+        else:
+            await execute(conn, "commit")
+            if committed is not None:
+                await committed(tx)
+        finally:
+            var.reset(token)
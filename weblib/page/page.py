@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, replace
-from typing import Protocol, Any, Tuple
+from typing import Protocol, Any, Iterable, Iterator, Tuple
 
-from ..elements.core import Element, render_node
+from ..elements.core import Element, render_node, render_node_iter
+
+# Default size of the encoded chunks yielded by Page.iter_render
+CHUNK_SIZE = 16 * 1024
 
 
 class Layout(Protocol):
@@ -20,6 +23,7 @@ class Page:
     _body: Tuple[Element, ...] = ()
     _scripts: Tuple[Element, ...] = ()
     _css: Tuple[Any, ...] = ()  # CSS objects with render()
+    streaming: bool = False  # adapt_result sends iter_render() chunks
 
     def __post_init__(self):
         if self._meta is None:
@@ -42,31 +46,70 @@ class Page:
     def use_css(self, *sheets: Any) -> "Page":
         return replace(self, _css=tuple(self._css) + tuple(sheets))
 
-    def render(self) -> str:
+    def _resolve(self) -> "Page":
         # Apply layout if provided
-        page: Page = self
         if self.layout:
-            page = self.layout(self)  # type: ignore[misc]
+            return self.layout(self)  # type: ignore[misc]
+        return self
 
-        head_parts = [f"<meta charset=\"utf-8\">", f"<title>{page.title}</title>"]
-        for k, v in page._meta.items():
+    def _head_html(self) -> str:
+        head_parts = [f"<meta charset=\"utf-8\">", f"<title>{self.title}</title>"]
+        for k, v in self._meta.items():
             head_parts.append(f"<meta name=\"{k}\" content=\"{v}\">")
         # CSS
-        for sheet in page._css:
+        for sheet in self._css:
             try:
                 css_text = sheet.render()
             except Exception:
                 css_text = str(sheet)
             head_parts.append(f"<style>{css_text}</style>")
         # Additional head nodes
-        head_parts.extend(render_node(n) for n in page._head)
+        head_parts.extend(render_node(n) for n in self._head)
+        return (
+            f"<!doctype html><html lang=\"{self.lang}\">"
+            f"<head>{''.join(head_parts)}</head>"
+        )
+
+    def render(self) -> str:
+        page = self._resolve()
         body_html = "".join(render_node(n) for n in page._body)
         scripts_html = "".join(render_node(n) for n in page._scripts)
 
         return (
-            f"<!doctype html><html lang=\"{page.lang}\">"
-            f"<head>{''.join(head_parts)}</head>"
+            f"{page._head_html()}"
             f"<body>{body_html}{scripts_html}</body>"
             f"</html>"
         )
 
+    def iter_render(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Render the document as UTF-8 chunks of roughly `chunk_size` bytes.
+
+        The doctype and `<head>` are yielded on their own first, so the client
+        can start fetching stylesheets while the body is still being rendered.
+        """
+        page = self._resolve()
+        yield page._head_html().encode("utf-8")
+
+        def pieces() -> Iterator[str]:
+            yield "<body>"
+            for n in page._body:
+                yield from render_node_iter(n)
+            for n in page._scripts:
+                yield from render_node_iter(n)
+            yield "</body></html>"
+
+        yield from _buffered(pieces(), chunk_size)
+
+
+def _buffered(pieces: Iterable[str], chunk_size: int) -> Iterator[bytes]:
+    buf: list[str] = []
+    size = 0
+    for piece in pieces:
+        buf.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield "".join(buf).encode("utf-8")
+            buf.clear()
+            size = 0
+    if buf:
+        yield "".join(buf).encode("utf-8")
@@ -1,5 +1,5 @@
 from .core import Routes, route
+from .coalesce import coalesce
 from .responses import HTTP
 
-__all__ = ["Routes", "route", "HTTP"]
-
+__all__ = ["Routes", "route", "coalesce", "HTTP"]
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import functools
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+from ..runtime.adapters import adapt_result
+from ..runtime.asgi import Request, Response
+from .core import Handler
+
+KeyFunc = Callable[[Request], Hashable]
+
+
+def coalesce(vary: Sequence[str] = ("authorization", "cookie"), key: Optional[KeyFunc] = None) -> Callable[[Handler], Handler]:
+    """Share one handler run between identical GET/HEAD requests in flight.
+
+    While the first request for a URL is being handled, identical requests
+    (same method, path and query string, plus the `vary` headers) wait for
+    its response instead of running the handler again. Each caller gets its
+    own copy of the response, so middlewares can still set per-request
+    headers. `vary` defaults to the credentials headers so that personalised
+    pages are never shared between users; pass `vary=()` for public pages,
+    or `key=` to build the rest of the key yourself (the method is always
+    part of it, so HEAD and GET never share a run). Streaming responses
+    can't be shared: requests already waiting run the handler themselves,
+    and once a handler has streamed it is no longer coalesced.
+
+        @route.get("/")
+        @coalesce(vary=())
+        async def home(req): ...
+    """
+    names = tuple(h.lower() for h in vary)
+
+    def decorator(func: Handler) -> Handler:
+        flights: Dict[Hashable, "asyncio.Future[Response]"] = {}
+        streams = False
+
+        async def run(k: Hashable, req: Request, params: Dict[str, Any]) -> Response:
+            try:
+                return adapt_result(await func(req, **params))
+            finally:
+                # late arrivals start a new run instead of getting a finished response
+                flights.pop(k, None)
+
+        @functools.wraps(func)
+        async def wrapper(req: Request, **params: Any) -> Any:
+            nonlocal streams
+            if streams or req.method not in ("GET", "HEAD"):
+                return await func(req, **params)
+            if key is not None:
+                k = (req.method, key(req))
+            else:
+                headers = req.headers
+                k = (req.method, req.path, req.query_string, tuple(headers.get(h) for h in names))
+            flight = flights.get(k)
+            if flight is None:
+                flight = flights[k] = asyncio.ensure_future(run(k, req, params))
+                flight.add_done_callback(_retrieve)
+                shared = False
+            else:
+                shared = True
+            # the run goes on if its first caller disconnects: the others are waiting on it
+            resp = await asyncio.shield(flight)
+            if not isinstance(resp.body, (bytes, bytearray, memoryview)):
+                # an iterator can only be sent once: it stays with the request that started the run,
+                # and later requests skip the wait instead of queueing behind the next stream
+                streams = True
+                return await func(req, **params) if shared else resp
+            out = copy.copy(resp)
+            out.headers = dict(resp.headers)
+            return out
+
+        return wrapper
+
+    return decorator
+
+
+def _retrieve(flight: "asyncio.Future[Any]") -> None:
+    # nobody may be left waiting: don't report the exception as never retrieved
+    if not flight.cancelled():
+        flight.exception()
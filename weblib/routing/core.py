@@ -5,6 +5,7 @@ from dataclasses import dataclass
 from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
 
 from ..runtime.asgi import Request
+from .radix import RadixTree, split_path
 
 Handler = Callable[..., Awaitable[Any]]
 Middleware = Callable[[Handler], Handler]
@@ -21,21 +22,63 @@ class Route:
     middlewares: List[Middleware] | None = None
 
 
+def _identity(s: str) -> str:
+    return s
+
+
 class Router:
+    """Route matcher backed by one radix tree per HTTP method.
+
+    The trees are rebuilt lazily whenever routes are added to the underlying
+    `Routes` (it is shared by reference, so late `register()` calls still work).
+    """
+
     def __init__(self, routes: "Routes") -> None:
         self._routes: List[Route] = routes._routes
-
-    def match(self, method: str, path: str) -> tuple[Handler, dict[str, Any], List[Middleware]]:
-        method = method.upper()
+        self._trees: Dict[str, RadixTree] = {}
+        self._static: Dict[str, Dict[str, Route]] = {}
+        self._compiled = -1
+
+    def compile(self) -> None:
+        trees: Dict[str, RadixTree] = {}
+        for index, r in enumerate(self._routes):
+            tree = trees.get(r.method)
+            if tree is None:
+                tree = trees[r.method] = RadixTree()
+            tree.insert(index, r.path_template, r)
+        # Fully static paths that no earlier dynamic route shadows are served
+        # straight from a dict, skipping the tree walk.
+        static: Dict[str, Dict[str, Route]] = {}
         for r in self._routes:
-            if r.method != method:
-                continue
-            m = r.pattern.fullmatch(path)
-            if not m:
+            if "{" in r.path_template:
                 continue
-            params = {k: r.param_converters.get(k, lambda s: s)(v) for k, v in m.groupdict().items()}
-            return r.handler, params, (r.middlewares or [])
-        raise LookupError("No route matched")
+            segs = split_path(r.path_template) or []
+            found = trees[r.method].lookup(segs)
+            if found is not None and found[0] is r:
+                static.setdefault(r.method, {}).setdefault("".join("/" + seg for seg in segs), r)
+        self._trees = trees
+        self._static = static
+        self._compiled = len(self._routes)
+
+    def lookup(self, method: str, path: str) -> tuple[Route, dict[str, Any]]:
+        if self._compiled != len(self._routes):
+            self.compile()
+        method = method.upper()
+        hit = self._static.get(method, {}).get(path.rstrip("/"))
+        if hit is not None and path[:1] == "/":
+            return hit, {}
+        tree = self._trees.get(method)
+        segs = split_path(path)
+        found = tree.lookup(segs) if tree is not None and segs is not None else None
+        if found is None:
+            raise LookupError("No route matched")
+        r, captured = found
+        conv = r.param_converters
+        return r, {k: conv.get(k, _identity)(v) for k, v in captured}
+
+    def match(self, method: str, path: str) -> tuple[Handler, dict[str, Any], List[Middleware]]:
+        r, params = self.lookup(method, path)
+        return r.handler, params, (r.middlewares or [])
 
 
 class route:
@@ -106,13 +149,18 @@ class Routes:
         self.prefix = prefix.rstrip("/")
         self.middlewares: List[Middleware] = middlewares or []
         self._routes: List[Route] = []
+        # bumped on every change to the route table or middleware stack, so
+        # precompiled handler chains (see WebApp) know when to rebuild
+        self._version = 0
 
     def include(self, other: "Routes") -> None:
         for r in other._routes:
             self._routes.append(r)
+        self._version += 1
 
     def use(self, middleware: Middleware) -> None:
         self.middlewares.append(middleware)
+        self._version += 1
 
     def register(self, *handlers: Handler) -> None:
         for h in handlers:
@@ -123,3 +171,4 @@ class Routes:
                 full_path = f"{self.prefix}{path if path.startswith('/') else '/' + path}"
                 pattern, converters = compile_path(full_path)
                 self._routes.append(Route(method, full_path, pattern, converters, h, name=name, middlewares=list(self.middlewares)))
+        self._version += 1
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Same placeholder syntax accepted by compile_path: {name:conv} and {name}
+_PARAM = re.compile(r"\{(?P<name>[a-zA-Z_][a-zA-Z0-9_]*)(?:\:(?P<conv>[a-z]+))?\}")
+
+# Dynamic edge kinds
+_INT = 0  # whole segment is {name:int} -> \d+
+_STR = 1  # whole segment is {name} / {name:str} / {name:bool} -> [^/]+
+_RE = 2  # mixed segment, e.g. "{name}.txt" -> per-segment regex
+
+
+def split_path(path: str) -> Optional[List[str]]:
+    """Split a request path (or template) into segments.
+
+    Trailing slashes are ignored, mirroring the `/*$` suffix that
+    compile_path appends to every pattern.
+    """
+    if path and path[0] != "/":
+        return None
+    stripped = path.rstrip("/")
+    return stripped.split("/")[1:] if stripped else []
+
+
+def _segment_edge(seg: str) -> Tuple[int, Any]:
+    m = _PARAM.fullmatch(seg)
+    if m:
+        return (_INT if m.group("conv") == "int" else _STR), m.group("name")
+    # mixed literal/param segment: escape the literal parts
+    out: List[str] = []
+    pos = 0
+    for m in _PARAM.finditer(seg):
+        out.append(re.escape(seg[pos : m.start()]))
+        name = m.group("name")
+        out.append(fr"(?P<{name}>\d+)" if m.group("conv") == "int" else fr"(?P<{name}>[^/]+)")
+        pos = m.end()
+    out.append(re.escape(seg[pos:]))
+    return _RE, re.compile("".join(out))
+
+
+class _Node:
+    __slots__ = ("static", "dynamic", "route", "min_index")
+
+    def __init__(self) -> None:
+        self.static: Dict[str, _Node] = {}
+        self.dynamic: List[Tuple[int, Any, _Node]] = []
+        self.route: Optional[Tuple[int, Any]] = None  # (registration index, Route)
+        self.min_index: float = float("inf")  # lowest index in this subtree
+
+
+class RadixTree:
+    """Segment-wise prefix tree for one HTTP method.
+
+    Static segments are dict lookups; `{id:int}`/`{slug}` become parameter
+    edges. When several routes match, the one registered first wins, exactly
+    like the linear scan: every node keeps the lowest registration index of
+    its subtree, so branches that cannot beat the current best are pruned.
+    """
+
+    def __init__(self) -> None:
+        self.root = _Node()
+
+    def insert(self, index: int, template: str, route: Any) -> None:
+        node = self.root
+        node.min_index = min(node.min_index, index)
+        for seg in split_path(template) or []:
+            if "{" not in seg:
+                child = node.static.get(seg)
+                if child is None:
+                    child = node.static[seg] = _Node()
+            else:
+                kind, key = _segment_edge(seg)
+                pattern_key = key.pattern if kind == _RE else key
+                for k, existing, child in node.dynamic:
+                    if k == kind and (existing.pattern if k == _RE else existing) == pattern_key:
+                        break
+                else:
+                    child = _Node()
+                    node.dynamic.append((kind, key, child))
+            node = child
+            node.min_index = min(node.min_index, index)
+        if node.route is None or index < node.route[0]:
+            node.route = (index, route)
+
+    def lookup(self, segs: List[str]) -> Optional[Tuple[Any, List[Tuple[str, str]]]]:
+        best: List[Any] = [float("inf"), None, None]
+        self._walk(self.root, segs, 0, [], best)
+        if best[1] is None:
+            return None
+        return best[1], best[2]
+
+    def _walk(self, node: _Node, segs: List[str], i: int, captured: List[Tuple[str, str]], best: List[Any]) -> None:
+        if node.min_index >= best[0]:
+            return
+        if i == len(segs):
+            if node.route is not None and node.route[0] < best[0]:
+                best[0], best[1], best[2] = node.route[0], node.route[1], list(captured)
+            return
+        seg = segs[i]
+        child = node.static.get(seg)
+        if child is not None:
+            self._walk(child, segs, i + 1, captured, best)
+        if not seg:
+            return
+        for kind, key, child in node.dynamic:
+            if kind == _INT:
+                if not seg.isdecimal():
+                    continue
+                captured.append((key, seg))
+                self._walk(child, segs, i + 1, captured, best)
+                captured.pop()
+            elif kind == _STR:
+                captured.append((key, seg))
+                self._walk(child, segs, i + 1, captured, best)
+                captured.pop()
+            else:
+                m = key.fullmatch(seg)
+                if not m:
+                    continue
+                groups = list(m.groupdict().items())
+                captured.extend(groups)
+                self._walk(child, segs, i + 1, captured, best)
+                del captured[len(captured) - len(groups) :]
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, AsyncIterable, Mapping, Optional
+from typing import Any, AsyncIterable, Iterable, Mapping, Optional
 
+from ..assets.files import FileResponse
 from ..runtime.asgi import Response
 
 
@@ -34,23 +35,15 @@ class HTTP:
         return Response.html(markup, status=status)
 
     @staticmethod
-    def stream(iterator: AsyncIterable[bytes], *, content_type: str):
-        # Minimal streaming support via iterable; for simplicity treat as iterable
-        return Response(iterator, status=200, content_type=content_type)
+    def stream(iterator: AsyncIterable[bytes] | Iterable[bytes], *, content_type: str, chunk_size: int = 0):
+        # Async iterables are awaited on the loop, sync ones are pulled off-loop;
+        # chunk_size > 0 coalesces small chunks (e.g. CSV rows) into larger writes
+        return Response(iterator, status=200, content_type=content_type, chunk_size=chunk_size)
 
     @staticmethod
     def file(path: str, *, filename: str | None = None):
-        # Simple file responder for development use only
-        import os
-        import mimetypes
-
-        if not os.path.exists(path) or not os.path.isfile(path):
-            return Response.text("Not Found", status=404)
-        mime, _ = mimetypes.guess_type(path)
-        with open(path, "rb") as f:
-            data = f.read()
+        # Served by the same engine as Static (validators, 304s, ranges, pathsend), but stat-ed on every send
         headers = {}
         if filename:
             headers["content-disposition"] = f"attachment; filename=\"{filename}\""
-        return Response(data, status=200, content_type=mime or "application/octet-stream", headers=headers)
-
+        return FileResponse(path, headers=headers)
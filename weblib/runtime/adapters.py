@@ -10,6 +10,9 @@ def adapt_result(result: Any) -> Response:
     if isinstance(result, Response):
         return result
     if isinstance(result, Page):
+        if result.streaming:
+            # chunked transfer: the head goes out before the body is rendered
+            return Response(result.iter_render(), content_type="text/html; charset=utf-8")
         return Response.html(result.render())
     if isinstance(result, (dict, list)):
         return Response.json(result)
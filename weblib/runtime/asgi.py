@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any, Awaitable, Callable, Dict, Iterable, Mapping, MutableMapping, Optional
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Mapping, MutableMapping, Optional
 
 Scope = Dict[str, Any]
 Receive = Callable[[], Awaitable[Dict[str, Any]]]
@@ -51,17 +52,61 @@ class Request:
         return json.loads((await self.body()).decode() or "null")
 
 
+_DONE = object()
+
+
+async def _iter_body(body: Iterable[bytes] | AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    if hasattr(body, "__aiter__"):
+        try:
+            async for chunk in body:  # type: ignore[union-attr]
+                yield chunk
+        finally:
+            aclose = getattr(body, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        return
+    # Sync iterables may block (file/DB reads): pull each item off-loop
+    it = iter(body)  # type: ignore[arg-type]
+    try:
+        while True:
+            chunk = await asyncio.to_thread(next, it, _DONE)
+            if chunk is _DONE:
+                break
+            yield chunk  # type: ignore[misc]
+    finally:
+        close = getattr(it, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # still running in a worker thread after a cancellation
+                pass
+
+
+async def _wait_disconnect(receive: Receive) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
 class Response:
+    # False for bodies the compression layer must not touch (e.g. files)
+    compressible = True
+
     def __init__(
         self,
-        body: bytes | Iterable[bytes] | None = None,
+        body: bytes | Iterable[bytes] | AsyncIterable[bytes] | None = None,
         *,
         status: int = 200,
         content_type: str | None = None,
         headers: Optional[MutableMapping[str, str]] = None,
+        chunk_size: int = 0,
     ) -> None:
         self.status = status
         self.body = body if body is not None else b""
+        # streaming bodies: coalesce chunks up to this many bytes (0 = send as produced)
+        self.chunk_size = chunk_size
         self.headers: MutableMapping[str, str] = {k.lower(): v for k, v in (headers or {}).items()}
         if content_type:
             self.headers.setdefault("content-type", content_type)
@@ -70,6 +115,10 @@ class Response:
         return self._send(scope, receive, send)
 
     async def _send(self, scope: Scope, receive: Receive, send: Send):
+        await self._send_start(send)
+        await self._send_body(receive, send)
+
+    async def _send_start(self, send: Send) -> None:
         await send(
             {
                 "type": "http.response.start",
@@ -77,17 +126,59 @@ class Response:
                 "headers": [(k.encode(), v.encode()) for k, v in self.headers.items()],
             }
         )
-        if isinstance(self.body, (bytes, bytearray)):
-            await send({"type": "http.response.body", "body": bytes(self.body), "more_body": False})
-        else:
-            # iterable streaming
-            async def _aiter():
-                for chunk in self.body:  # type: ignore[attr-defined]
-                    yield chunk
 
-            async for chunk in _aiter():
+    async def _send_body(self, receive: Receive, send: Send) -> None:
+        if isinstance(self.body, (bytes, bytearray, memoryview)):
+            await send({"type": "http.response.body", "body": bytes(self.body), "more_body": False})
+            return
+        # Stream until exhausted; stop early if the client disconnects
+        pump = asyncio.ensure_future(self._pump(send))
+        watch = asyncio.ensure_future(_wait_disconnect(receive))
+        try:
+            await asyncio.wait({pump, watch}, return_when=asyncio.FIRST_COMPLETED)
+            if not pump.done() and watch.exception() is not None:
+                # receive() is unusable: keep streaming without the watcher
+                await asyncio.wait({pump})
+        finally:
+            watch.cancel()
+            if not pump.done():
+                pump.cancel()
+                try:
+                    await pump
+                except asyncio.CancelledError:
+                    pass
+        if not pump.cancelled():
+            pump.result()
+
+    async def _chunks(self) -> AsyncIterator[bytes]:
+        buf = bytearray()
+        source = _iter_body(self.body)  # type: ignore[arg-type]
+        try:
+            async for chunk in source:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                if not self.chunk_size:
+                    if chunk:
+                        yield bytes(chunk)
+                    continue
+                buf += chunk
+                if len(buf) >= self.chunk_size:
+                    yield bytes(buf)
+                    buf.clear()
+        finally:
+            await source.aclose()
+        if buf:
+            yield bytes(buf)
+
+    async def _pump(self, send: Send) -> None:
+        # One chunk in flight at a time: awaiting send() is the backpressure
+        chunks = self._chunks()
+        try:
+            async for chunk in chunks:
                 await send({"type": "http.response.body", "body": chunk, "more_body": True})
-            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            await chunks.aclose()
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
 
     # Helpers
     @staticmethod
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator
+
+from .asgi import Response
+from ..utils import negotiate_encoding
+
+try:  # optional dependency
+    import brotli as _brotli  # type: ignore
+except Exception:  # pragma: no cover - depends on environment
+    _brotli = None
+
+# Content types that are already compressed (or not worth it)
+_SKIP_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+_SKIP_TYPES = {
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-brotli",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/pdf",
+    "application/octet-stream",
+    "text/event-stream",
+}
+
+
+class _Gzip:
+    def __init__(self, level: int) -> None:
+        self._c = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        out = self._c.compress(data)
+        return out + self._c.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _Brotli:
+    def __init__(self, quality: int) -> None:
+        self._c = _brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        out = self._c.process(data)
+        return out + self._c.flush() if flush else out
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class Compressor:
+    """Response compression negotiated from Accept-Encoding.
+
+    Buffered bodies below `min_size` are left alone; streaming bodies are
+    compressed chunk by chunk. When the response sends chunks as produced
+    (`chunk_size=0`) each one is sync-flushed so streaming pages keep their
+    time-to-first-byte; otherwise the compressor buffers freely.
+    """
+
+    def __init__(
+        self,
+        *,
+        gzip: bool = True,
+        brotli: bool = False,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        min_size: int = 500,
+    ) -> None:
+        self.encodings: list[str] = []
+        if brotli and _brotli is not None:
+            self.encodings.append("br")
+        if gzip:
+            self.encodings.append("gzip")
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+
+    def _new(self, encoding: str) -> Any:
+        return _Brotli(self.brotli_quality) if encoding == "br" else _Gzip(self.gzip_level)
+
+    def apply(self, resp: Response, accept_encoding: str) -> Response:
+        if not self.encodings or not resp.compressible or resp.status < 200 or resp.status in (204, 304):
+            return resp
+        headers = resp.headers
+        if "content-encoding" in headers:
+            return resp
+        ctype = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if ctype in _SKIP_TYPES or ctype.startswith(_SKIP_PREFIXES):
+            return resp
+        body = resp.body
+        buffered = isinstance(body, (bytes, bytearray, memoryview))
+        if buffered and len(body) < self.min_size:
+            return resp
+        vary = headers.get("vary")
+        if not vary:
+            headers["vary"] = "Accept-Encoding"
+        elif "accept-encoding" not in vary.lower():
+            headers["vary"] = f"{vary}, Accept-Encoding"
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            return resp
+        c = self._new(encoding)
+        if buffered:
+            out = c.compress(bytes(body), False) + c.finish()
+            if len(out) >= len(body):
+                return resp
+            resp.body = out
+        elif hasattr(body, "__aiter__"):
+            resp.body = _compress_aiter(body, c, flush=not resp.chunk_size)  # type: ignore[arg-type]
+        else:
+            resp.body = _compress_iter(body, c, flush=not resp.chunk_size)  # type: ignore[arg-type]
+        headers["content-encoding"] = encoding
+        headers.pop("content-length", None)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # the encoded bytes differ from what the validator was computed on
+            headers["etag"] = "W/" + etag
+        return resp
+
+
+def _encode(chunk: Any) -> bytes:
+    return chunk.encode("utf-8") if isinstance(chunk, str) else bytes(chunk)
+
+
+def _compress_iter(chunks: Iterable[Any], c: Any, flush: bool) -> Iterator[bytes]:
+    # Stays a sync generator so Response keeps pulling it off-loop
+    try:
+        for chunk in chunks:
+            out = c.compress(_encode(chunk), flush)
+            if out:
+                yield out
+        yield c.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+async def _compress_aiter(chunks: AsyncIterable[Any], c: Any, flush: bool) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in chunks:
+            out = c.compress(_encode(chunk), flush)
+            if out:
+                yield out
+        yield c.finish()
+    finally:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
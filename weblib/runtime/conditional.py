@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import zlib
+from typing import Optional
+
+from .asgi import Response
+from ..utils import etag_matches
+
+# Headers a 304 must not carry (they describe the omitted body)
+_BODY_HEADERS = ("content-type", "content-length", "content-encoding")
+
+
+def etag_for(body: bytes) -> str:
+    """Weak validator from the length and CRC32 of a buffered body."""
+    return f"W/\"{len(body):x}-{zlib.crc32(body):08x}\""
+
+
+def not_modified(resp: Response) -> Response:
+    headers = {k: v for k, v in resp.headers.items() if k not in _BODY_HEADERS}
+    return Response(b"", status=304, headers=headers)
+
+
+def apply_etag(resp: Response, method: str, if_none_match: Optional[str]) -> Response:
+    """Tag a fully buffered 200 response and answer a matching If-None-Match with 304.
+
+    Streaming bodies are left untouched; responses that already carry an
+    ETag (e.g. from the `etag()` middleware) are only checked.
+    """
+    if method not in ("GET", "HEAD") or resp.status != 200:
+        return resp
+    tag = resp.headers.get("etag")
+    if tag is None:
+        body = resp.body
+        if not isinstance(body, (bytes, bytearray, memoryview)) or not resp.compressible:
+            return resp
+        tag = resp.headers["etag"] = etag_for(bytes(body))
+    if if_none_match and etag_matches(if_none_match, tag):
+        return not_modified(resp)
+    return resp
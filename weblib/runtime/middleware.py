@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import inspect
 import time
 import uuid
 from collections import defaultdict, deque
@@ -7,6 +10,8 @@ from typing import Any, Awaitable, Callable, Deque, Dict, Tuple
 
 from .asgi import Response
 from .adapters import adapt_result
+from .conditional import not_modified
+from ..utils import etag_matches
 
 
 # A handler takes (req, **params) and returns awaitable Any
@@ -14,6 +19,34 @@ Handler = Callable[..., Awaitable[Any]]
 Middleware = Callable[[Handler], Handler]
 
 
+class MiddlewareStack(list):
+    """A list of middlewares that counts its changes in `version`.
+
+    Precompiled handler chains compare the version instead of the list, so
+    editing the stack in place (append, insert, del, slice assignment...)
+    is picked up on the next request.
+    """
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self.version = 0
+
+
+def _counted(name: str) -> Callable[..., Any]:
+    method = getattr(list, name)
+
+    @functools.wraps(method)
+    def changed(self: MiddlewareStack, *args: Any, **kwargs: Any) -> Any:
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    return changed
+
+
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse", "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(MiddlewareStack, _name, _counted(_name))
+
+
 def apply_middlewares(handler: Handler, middlewares: list[Middleware]) -> Handler:
     wrapped = handler
     for mw in reversed(middlewares):
@@ -131,6 +164,41 @@ def rate_limit(limit: int, window: float, key_fn: Callable[[Any], str] | None =
     return mw
 
 
+def etag(version: Callable[..., Any]) -> Middleware:
+    """Conditional GET driven by a cheap version instead of the rendered body.
+
+    `version(req, **params)` (sync or async) returns e.g. a row's updated_at
+    or a counter; None disables the check. When If-None-Match matches, the
+    handler is not called at all and an empty 304 is returned. Usable as a
+    route middleware or directly as a handler decorator:
+
+        @route.get("/posts/{id:int}")
+        @etag(lambda req, id: post_versions.get(id))
+        async def show(req, id): ...
+    """
+
+    def mw(next_handler: Handler) -> Handler:
+        @functools.wraps(next_handler)
+        async def _wrapped(req, **params):
+            v = version(req, **params)
+            if inspect.isawaitable(v):
+                v = await v
+            if v is None:
+                return await next_handler(req, **params)
+            tag = f"W/\"{hashlib.blake2b(str(v).encode(), digest_size=8).hexdigest()}\""
+            inm = req.headers.get("if-none-match")
+            if inm and req.method in ("GET", "HEAD") and etag_matches(inm, tag):
+                return not_modified(Response(b"", headers={"etag": tag}))
+            result = await next_handler(req, **params)
+            resp = result if isinstance(result, Response) else adapt_result(result)
+            resp.headers.setdefault("etag", tag)
+            return resp
+
+        return _wrapped
+
+    return mw
+
+
 # Minimal in-memory sessions (for dev only)
 class MemorySessionStore:
     def __init__(self) -> None:
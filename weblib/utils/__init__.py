@@ -1,4 +1,5 @@
 from .escaping import escape_html
+from .headers import etag_matches, negotiate_encoding
 
-__all__ = ["escape_html"]
+__all__ = ["escape_html", "etag_matches", "negotiate_encoding"]
 
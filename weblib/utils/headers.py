@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+
+def negotiate_encoding(accept_encoding: str, available: Sequence[str]) -> str | None:
+    """Pick a content-coding from `available` allowed by an Accept-Encoding value.
+
+    Highest q-value wins; ties go to the order of `available` (server
+    preference). Codings with q=0 are refused; `*` covers unlisted ones.
+    """
+    if not accept_encoding:
+        return None
+    qs: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            k, _, v = param.strip().partition("=")
+            if k == "q":
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        qs[coding] = q
+    best: str | None = None
+    best_q = 0.0
+    for coding in available:
+        q = qs.get(coding, qs.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as required for If-None-Match
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False